@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 自适应并发控制
+AIMD（加性增、乘性减）调整同时在途的 API 请求数：
+p95 延迟保持稳定时逐步提高上限，遇到超时、HTTP 429/503 或 API error_code 时减半，
+无需针对每个部署手动调整并发数
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+import requests
+
+from metrics import CONCURRENCY_DECREASES, CONCURRENCY_LIMIT, percentile
+
+# 视为服务端过载的 HTTP 状态码
+CONGESTION_STATUS_CODES = {429, 503}
+
+# 拥塞原因
+REASON_TIMEOUT = "timeout"
+REASON_API_ERROR = "api_error"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 并发限制器（线程安全）
+
+    - 每个请求尝试前 acquire()，结束后 release()
+    - 成功时记录延迟：最近 window 个请求的 p95 不超过基线的 latency_tolerance 倍时，
+      每完成“当前上限”个请求，上限加 1
+    - 拥塞时上限乘以 backoff；同一轮在途请求的连续失败只减一次（冷却时间为近期延迟中位数）
+    - 每次减小后重新测量延迟基线
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        backoff: float = 0.5,
+        latency_tolerance: float = 1.5,
+        window: int = 20,
+    ):
+        """
+        Args:
+            initial: 初始并发上限
+            min_limit: 并发上限的下限
+            max_limit: 并发上限的上限
+            backoff: 拥塞时的缩减系数（0~1）
+            latency_tolerance: p95 延迟相对基线允许的增长倍数，超出后停止增加并发
+            window: 计算 p95 使用的最近请求数
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.window = window
+
+        self._cond = threading.Condition()
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self.decreases: Dict[str, int] = {}
+        self.peak_limit = int(self._limit)
+        self.lowest_limit = int(self._limit)
+        CONCURRENCY_LIMIT.set(int(self._limit))
+
+    @classmethod
+    def from_config(cls, adaptive_config: Dict[str, Any], initial: int) -> "AdaptiveLimiter":
+        """
+        根据配置创建限制器
+
+        Args:
+            adaptive_config: 自适应并发配置（batch.adaptive）
+            initial: 初始并发上限（通常为 batch.workers）
+
+        Returns:
+            AdaptiveLimiter
+        """
+        return cls(
+            initial=initial,
+            min_limit=adaptive_config.get("min_workers", 1),
+            max_limit=adaptive_config.get("max_workers", 32),
+            backoff=adaptive_config.get("backoff", 0.5),
+            latency_tolerance=adaptive_config.get("latency_tolerance", 1.5),
+            window=adaptive_config.get("window", 20),
+        )
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    def acquire(self):
+        """等待直到在途请求数低于当前上限"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        """请求结束，释放名额"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float):
+        """
+        记录一次成功请求
+
+        Args:
+            latency: 请求耗时（秒）
+        """
+        with self._cond:
+            self._latencies.append(latency)
+            if len(self._latencies) >= self.window:
+                p95 = percentile(self._latencies, 95)
+                if self._baseline is None:
+                    self._baseline = p95
+                elif p95 > self._baseline * self.latency_tolerance:
+                    # 延迟明显上升：保持当前上限
+                    return
+                else:
+                    self._baseline = min(self._baseline, p95)
+
+            if self._limit < self.max_limit:
+                old_limit = int(self._limit)
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                if int(self._limit) != old_limit:
+                    self._on_limit_changed(old_limit, "延迟稳定")
+                    self._cond.notify_all()
+
+    def on_congestion(self, reason: str):
+        """
+        记录一次拥塞信号（超时、429/503、error_code）
+
+        Args:
+            reason: 拥塞原因，如 timeout / http_429 / api_error
+        """
+        with self._cond:
+            now = time.monotonic()
+            cooldown = statistics.median(self._latencies) if self._latencies else 1.0
+            if now - self._last_decrease < cooldown:
+                return
+            self._last_decrease = now
+            old_limit = int(self._limit)
+            self._limit = max(self.min_limit, self._limit * self.backoff)
+            self.decreases[reason] = self.decreases.get(reason, 0) + 1
+            CONCURRENCY_DECREASES.inc(reason=reason)
+            # 上限降低后重新测量延迟基线
+            self._latencies.clear()
+            self._baseline = None
+            if int(self._limit) != old_limit:
+                self._on_limit_changed(old_limit, reason)
+
+    def _on_limit_changed(self, old_limit: int, reason: str):
+        new_limit = int(self._limit)
+        self.peak_limit = max(self.peak_limit, new_limit)
+        self.lowest_limit = min(self.lowest_limit, new_limit)
+        CONCURRENCY_LIMIT.set(new_limit)
+        print(f"并发上限调整: {old_limit} -> {new_limit}（{reason}）")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        导出运行统计
+
+        Returns:
+            {"limit", "peak_limit", "lowest_limit", "decreases"}
+        """
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "peak_limit": self.peak_limit,
+                "lowest_limit": self.lowest_limit,
+                "decreases": dict(self.decreases),
+            }
+
+
+def classify_congestion(error: BaseException) -> Optional[str]:
+    """
+    判断异常是否表示服务端过载
+
+    Args:
+        error: 请求过程中的异常
+
+    Returns:
+        拥塞原因，不属于拥塞时返回 None
+    """
+    if isinstance(error, requests.exceptions.Timeout):
+        return REASON_TIMEOUT
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        if error.response.status_code in CONGESTION_STATUS_CODES:
+            return f"http_{error.response.status_code}"
+    return None
+
+
+class RequestSlot:
+    """
+    单次请求尝试的并发名额（上下文管理器）
+    进入时等待名额，退出时释放；异常退出时按异常类型上报拥塞，
+    正常完成需调用 success()，API 返回 error_code 时调用 congested()
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveLimiter]):
+        """
+        Args:
+            limiter: 并发限制器，为空时不做限制
+        """
+        self.limiter = limiter
+        self._reported = False
+
+    def __enter__(self) -> "RequestSlot":
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return self
+
+    def success(self, latency: float):
+        """上报请求成功及其耗时"""
+        if self.limiter is not None and not self._reported:
+            self._reported = True
+            self.limiter.on_success(latency)
+
+    def congested(self, reason: str):
+        """上报拥塞"""
+        if self.limiter is not None and not self._reported:
+            self._reported = True
+            self.limiter.on_congestion(reason)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.limiter is None:
+            return
+        if exc is not None:
+            reason = classify_congestion(exc)
+            if reason:
+                self.congested(reason)
+        self.limiter.release()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 批量处理断点日志
+只追加的 JSON Lines 文件，记录每个文件的完成/失败状态与输出文件；
+批量任务中断后重新运行时跳过已完成（且输出仍在）的文件，只处理剩余部分；
+批次全部成功后删除日志，之后的运行重新处理全部文件
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+# 默认日志文件名（位于输出目录下）
+DEFAULT_JOURNAL_NAME = ".paddleocr_journal.jsonl"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class BatchJournal:
+    """
+    断点日志
+    以“路径 + 文件大小 + 修改时间 + OCR 参数摘要”标识一个任务，
+    文件被修改或参数变化后会重新处理；每条记录写入后立即刷盘，
+    进程崩溃最多丢失正在处理中的文件
+    """
+
+    def __init__(self, journal_path: Path, options_digest: str):
+        """
+        Args:
+            journal_path: 日志文件路径
+            options_digest: OCR 参数摘要（fingerprint.options_hash）
+        """
+        self.journal_path = Path(journal_path)
+        self.options_digest = options_digest
+        self._lock = threading.Lock()
+        self._status: Dict[Tuple, Tuple[str, Optional[List[str]]]] = {}
+        self._load()
+
+    def _load(self):
+        """读取已有记录，同一任务以最后一条记录为准"""
+        if not self.journal_path.exists():
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key = (entry["path"], entry["size"], entry["mtime"], entry["options"])
+                    self._status[key] = (entry["status"], entry.get("outputs"))
+                except (ValueError, KeyError):
+                    # 崩溃时写了一半的最后一行，忽略
+                    continue
+
+    def _key(self, file_path: str) -> Tuple:
+        """计算任务标识"""
+        stat = os.stat(file_path)
+        return (str(Path(file_path).resolve()), stat.st_size, stat.st_mtime_ns, self.options_digest)
+
+    def is_done(self, file_path: str) -> bool:
+        """
+        文件是否已在之前的运行中成功完成，且记录的输出文件仍然存在
+        （未记录输出文件的旧记录视为未完成）
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            是否已完成
+        """
+        try:
+            status, outputs = self._status.get(self._key(file_path), (None, None))
+        except OSError:
+            return False
+        if status != STATUS_DONE or outputs is None:
+            return False
+        return all(os.path.exists(output) for output in outputs)
+
+    def record(
+        self,
+        file_path: str,
+        status: str,
+        error: Optional[str] = None,
+        outputs: Optional[List[str]] = None,
+    ):
+        """
+        追加一条记录并立即刷盘
+
+        Args:
+            file_path: 文件路径
+            status: done | failed
+            error: 失败原因
+            outputs: 写出的输出文件路径（done 时记录，续跑前检查是否仍然存在）
+        """
+        try:
+            path, size, mtime, options = self._key(file_path)
+        except OSError:
+            # 文件已不存在，无法标识任务，不记录
+            return
+        entry: Dict[str, Any] = {
+            "path": path,
+            "size": size,
+            "mtime": mtime,
+            "options": options,
+            "status": status,
+            "time": time.time(),
+        }
+        if error:
+            entry["error"] = error
+        if outputs is not None:
+            entry["outputs"] = [str(Path(output).resolve()) for output in outputs]
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._status[(path, size, mtime, options)] = (status, entry.get("outputs"))
+
+    def clear(self):
+        """删除日志（批次全部成功后调用，断点日志只用于中断后的续跑）"""
+        with self._lock:
+            try:
+                self.journal_path.unlink()
+            except FileNotFoundError:
+                pass
+            self._status.clear()
@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 性能基准测试
+在子进程中启动本地模拟服务，用合成语料驱动完整的识别流程
+（PaddleOCRClient.ocr / batch，即 ocr_file / batch_ocr 的实现），
+统计吞吐量、延迟分位数、客户端峰值内存与各阶段传输字节数，结果写为 JSON，可与基线对比
+
+用法:
+  python bench.py --output bench.json
+  python bench.py --scenarios small_png,multipage_pdf --workers 8 --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import yaml
+
+from config_loader import DEFAULT_CONFIG_PATH
+from metrics import percentile
+from mock_server import MockLayoutParsingServer, make_png
+from paddleocr_vl import PaddleOCRClient
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 场景定义：语料生成参数 + 模拟服务参数
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    # 大量小图片：考察请求开销与并发
+    "small_png": {
+        "kind": "png",
+        "files": 40,
+        "image_bytes": 5000,
+        "server": {"images_per_page": 1, "image_bytes": 2000},
+    },
+    # 多页 PDF：考察上传编码与按页计费的服务端耗时
+    "multipage_pdf": {
+        "kind": "pdf",
+        "files": 10,
+        "pages": 20,
+        "server": {"page_latency": 0.01, "images_per_page": 2, "image_bytes": 10000},
+    },
+    # 图片密集页面：考察结果保存与图片下载
+    "image_heavy": {
+        "kind": "pdf",
+        "files": 5,
+        "pages": 10,
+        "server": {"images_per_page": 30, "image_bytes": 30000, "image_latency": "fixed:0.02"},
+    },
+}
+
+# 与基线对比时“越大越好”的指标，其余指标越小越好
+HIGHER_IS_BETTER = {"files_per_second", "pages_per_second"}
+
+
+def make_pdf(num_pages: int, filler_bytes: int = 0, rng: Optional[random.Random] = None) -> bytes:
+    """
+    生成包含 num_pages 个空白页的合法 PDF
+
+    Args:
+        num_pages: 页数
+        filler_bytes: 每页附加的内容流大小，用于模拟扫描件体积
+        rng: 随机数生成器；指定时填充内容为随机十六进制字符，使每个文件内容不同
+
+    Returns:
+        PDF 内容
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(num_pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode())
+    for i in range(num_pages):
+        content_ref = 4 + i * 2
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {content_ref} 0 R >>".encode()
+        )
+        if rng is not None:
+            filler = "".join(rng.choices("0123456789abcdef", k=filler_bytes)).encode()
+        else:
+            filler = b"0" * filler_bytes
+        stream = b"%" + filler + b"\n"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref_offset
+    )
+    return bytes(output)
+
+
+def build_corpus(scenario: Dict[str, Any], corpus_dir: Path, seed: int) -> List[str]:
+    """
+    生成场景的合成语料
+
+    Args:
+        scenario: 场景定义
+        corpus_dir: 语料目录
+        seed: 随机种子
+
+    Returns:
+        文件路径列表
+    """
+    rng = random.Random(seed)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(scenario["files"]):
+        if scenario["kind"] == "png":
+            path = corpus_dir / f"sample_{i:04d}.png"
+            path.write_bytes(make_png(scenario.get("image_bytes", 5000), rng))
+        else:
+            path = corpus_dir / f"sample_{i:04d}.pdf"
+            path.write_bytes(make_pdf(scenario.get("pages", 1), scenario.get("page_bytes", 20000), rng))
+        files.append(str(path))
+    return files
+
+
+class RssSampler:
+    """后台线程定期采样常驻内存，记录测试期间的峰值"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_rss() -> Optional[int]:
+        """当前进程常驻内存（字节），无法获取时返回 None"""
+        try:
+            with open("/proc/self/status", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        if resource is not None:
+            # ru_maxrss 是历史峰值：Linux 为 KB，macOS 为字节
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.current_rss() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_rss() or 0)
+
+
+def _serve(options: Dict[str, Any], conn, stop_event):
+    """子进程入口：启动模拟服务，发回地址，停止时发回请求统计"""
+    server = MockLayoutParsingServer(**options)
+    server.start()
+    conn.send(server.url)
+    stop_event.wait()
+    conn.send(server.stats.snapshot())
+    server.stop()
+
+
+class ServerProcess:
+    """
+    在子进程中运行模拟服务
+    服务端会整体读取请求体并做 JSON 解析与 base64 解码，与客户端同进程时这些副本会计入峰值内存，
+    掩盖客户端流式编码的效果；放到子进程后峰值内存只反映客户端
+    """
+
+    # 等待子进程启动的最长时间（秒）
+    START_TIMEOUT = 30
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: MockLayoutParsingServer 的参数
+        """
+        self.options = options
+        self.url: Optional[str] = None
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_serve, args=(options, child_conn, self._stop_event), daemon=True
+        )
+
+    def start(self):
+        """启动子进程并等待服务就绪"""
+        self._process.start()
+        if not self._conn.poll(self.START_TIMEOUT):
+            self._process.terminate()
+            raise RuntimeError("模拟服务启动超时")
+        self.url = self._conn.recv()
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        停止服务
+
+        Returns:
+            服务端请求统计（MockLayoutParsingServer.stats.snapshot()）
+        """
+        self._stop_event.set()
+        stats = self._conn.recv() if self._conn.poll(self.START_TIMEOUT) else {}
+        self._process.join(self.START_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+        return stats
+
+
+def write_bench_config(work_dir: Path, server: ServerProcess, overrides: Dict[str, Any]):
+    """
+    基于默认配置生成压测用的 config.yaml 与 .env（指向模拟服务）
+
+    Returns:
+        (配置文件路径, .env 路径)
+    """
+    with open(DEFAULT_CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config.setdefault("cache", {})["enabled"] = False
+    # 合并相同请求会让部分文件不经过 API，吞吐与延迟不再反映真实上传
+    config["cache"]["coalesce"] = False
+    config.setdefault("batch", {})["resume"] = False
+    for section, values in overrides.items():
+        config.setdefault(section, {}).update(values)
+
+    config_path = work_dir / "config.yaml"
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+    env_path = work_dir / ".env"
+    env_path.write_text(
+        f"PADDLEOCR_TOKEN=bench-token\nPADDLEOCR_API_URL={server.url}\n", encoding="utf-8"
+    )
+    return config_path, env_path
+
+
+def run_scenario(
+    name: str,
+    scenario: Dict[str, Any],
+    args: argparse.Namespace,
+    work_dir: Path,
+) -> Dict[str, Any]:
+    """
+    运行单个场景
+
+    Returns:
+        场景指标
+    """
+    server_options = dict(scenario.get("server", {}))
+    server_options.setdefault("latency", args.latency)
+    server = ServerProcess(seed=args.seed, **server_options)
+    server.start()
+
+    stats: Dict[str, Any] = {}
+    try:
+        scenario_dir = work_dir / name
+        files = build_corpus(scenario, scenario_dir / "corpus", args.seed)
+        input_bytes = sum(os.path.getsize(path) for path in files)
+        config_path, env_path = write_bench_config(
+            scenario_dir, server, {"batch": {"workers": args.workers}}
+        )
+        output_dir = str(scenario_dir / "output")
+
+        # 屏蔽识别流程的逐文件输出
+        log = io.StringIO()
+        redirect = contextlib.redirect_stdout(log) if not args.verbose else contextlib.nullcontext()
+
+        with RssSampler() as sampler, redirect:
+            with PaddleOCRClient(args.mode, config_path, env_path) as client:
+                if args.workers == 1 and len(files) == 1:
+                    start = time.perf_counter()
+                    result = client.ocr(files[0], output_dir)
+                    elapsed = time.perf_counter() - start
+                    summary = {
+                        "success": 1,
+                        "failed": [],
+                        "durations": {files[0]: elapsed},
+                        "stage_totals": result["timings"],
+                        "elapsed": elapsed,
+                    }
+                else:
+                    summary = client.batch(files, output_dir, args.workers)
+    finally:
+        stats = server.stop()
+
+    latencies = list(summary["durations"].values())
+    elapsed = summary["elapsed"]
+    pages = stats.get("api_pages", 0)
+    return {
+        "files": len(files),
+        "succeeded": summary["success"],
+        "failed": len(summary["failed"]),
+        "workers": args.workers,
+        "elapsed_seconds": round(elapsed, 4),
+        "files_per_second": round(len(latencies) / elapsed, 4) if elapsed else None,
+        "pages_per_second": round(pages / elapsed, 4) if elapsed else None,
+        "latency_p50": _round(percentile(latencies, 50)),
+        "latency_p95": _round(percentile(latencies, 95)),
+        "latency_p99": _round(percentile(latencies, 99)),
+        "peak_rss_mb": round(sampler.peak_bytes / 1024 / 1024, 2),
+        "bytes": {
+            "input_files": input_bytes,
+            "upload": stats.get("api_bytes_in", 0),
+            "api_download": stats.get("api_bytes_out", 0),
+            "image_download": stats.get("image_bytes_out", 0),
+        },
+        "requests": {
+            "api": stats.get("api_requests", 0),
+            "images": stats.get("image_requests", 0),
+        },
+        "stages": summary["stage_totals"],
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """将嵌套指标展开为 a.b 形式，便于逐项对比"""
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> int:
+    """
+    与基线逐项对比并打印差异
+
+    Args:
+        report: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对退化比例（如 0.1 表示 10%）
+
+    Returns:
+        超出容忍范围的退化项数量
+    """
+    regressions = 0
+    print(f"\n{'='*50}")
+    print("与基线对比:")
+    for name, metrics in report["scenarios"].items():
+        base_metrics = baseline.get("scenarios", {}).get(name)
+        if base_metrics is None:
+            print(f"\n[{name}] 基线中无此场景")
+            continue
+        print(f"\n[{name}]")
+        current, base = _flatten(metrics), _flatten(base_metrics)
+        for key in sorted(current):
+            if key not in base or not base[key]:
+                continue
+            change = (current[key] - base[key]) / base[key]
+            metric = key.rsplit(".", 1)[-1]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            if key.startswith(("files_per", "pages_per", "latency", "peak_rss", "bytes.upload")):
+                if worse > tolerance:
+                    flag = "  <-- 退化"
+                    regressions += 1
+            print(f"  {key}: {base[key]} -> {current[key]} ({change:+.1%}){flag}")
+    return regressions
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="PaddleOCR-VL 性能基准测试（使用本地模拟服务，无需联网）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+可用场景: {", ".join(SCENARIOS)}
+
+示例:
+  # 运行全部场景并保存结果
+  python bench.py --output bench.json
+
+  # 8 并发运行，与已保存的基线对比，退化超过 10% 时返回非零退出码
+  python bench.py --workers 8 --baseline bench.json --tolerance 0.1
+        """
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="要运行的场景，逗号分隔")
+    parser.add_argument("--files", type=int, help="覆盖每个场景的文件数")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="并发数（默认: 4）")
+    parser.add_argument("--mode", "-m", default="标准", help="预设模式（默认: 标准）")
+    parser.add_argument("--latency", default="lognormal:-1.6,0.4", help="模拟服务延迟分布（默认: lognormal:-1.6,0.4）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（默认: 42）")
+    parser.add_argument("--output", "-o", help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", "-b", help="基线 JSON 路径，用于对比")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="允许的退化比例（默认: 0.1）")
+    parser.add_argument("--verbose", "-v", action="store_true", help="显示识别流程的详细输出")
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"错误: 未知场景: {unknown}，可选: {list(SCENARIOS)}")
+        sys.exit(1)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workers": args.workers,
+            "mode": args.mode,
+            "latency": args.latency,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="paddleocr_bench_") as work_dir:
+        for name in names:
+            scenario = dict(SCENARIOS[name])
+            if args.files:
+                scenario["files"] = args.files
+            print(f"运行场景: {name} ...")
+            metrics = run_scenario(name, scenario, args, Path(work_dir))
+            report["scenarios"][name] = metrics
+            print(
+                f"  {metrics['files_per_second']} 文件/秒, {metrics['pages_per_second']} 页/秒, "
+                f"p50={metrics['latency_p50']}s p95={metrics['latency_p95']}s p99={metrics['latency_p99']}s, "
+                f"峰值内存 {metrics['peak_rss_mb']} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare_with_baseline(report, baseline, args.tolerance):
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 熔断器
+服务端连续失败（超时、连接错误、5xx）达到阈值后打开熔断器，
+暂停期间的请求快速失败或挂起等待，经半开状态的探测请求确认恢复后再放行；
+避免服务中断时每个剩余文件都耗尽重试次数与超时时间
+"""
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from metrics import CIRCUIT_REJECTED, CIRCUIT_STATE
+from retry_policy import OCRAPIError
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# 指标中各状态对应的数值
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+# 熔断期间的处理方式
+MODE_PARK = "park"            # 挂起等待服务恢复
+MODE_FAIL_FAST = "fail_fast"  # 立即失败
+
+
+class CircuitOpenError(OCRAPIError):
+    """熔断器打开，请求未发送"""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+def is_outage_error(error: OCRAPIError) -> bool:
+    """
+    错误是否表示服务端不可用（超时、连接失败、5xx）
+
+    Args:
+        error: 分类后的错误
+
+    Returns:
+        是否计入熔断失败次数
+    """
+    if error.status is not None:
+        return error.status >= 500
+    return error.retryable and error.error_code is None
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    - 关闭：正常放行，连续 failure_threshold 次服务端失败后打开
+    - 打开：不发送请求；park 模式下挂起等待，fail_fast 模式下立即抛出 CircuitOpenError
+    - 半开：打开 recovery_timeout 秒后放行 half_open_max_calls 个探测请求，
+      成功则关闭，失败则重新打开
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        mode: str = MODE_PARK,
+        max_park_seconds: float = 600.0,
+    ):
+        """
+        Args:
+            failure_threshold: 打开熔断器所需的连续失败次数
+            recovery_timeout: 打开后等待多久进入半开状态（秒）
+            half_open_max_calls: 半开状态下同时放行的探测请求数
+            mode: 熔断期间的处理方式 park | fail_fast
+            max_park_seconds: park 模式下单个请求最长挂起时间（秒），超时后失败
+        """
+        if mode not in (MODE_PARK, MODE_FAIL_FAST):
+            raise ValueError(f"熔断模式无效: {mode}，可选: {MODE_PARK} | {MODE_FAIL_FAST}")
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+        self.mode = mode
+        self.max_park_seconds = max_park_seconds
+
+        self._cond = threading.Condition()
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._outages: List[Dict[str, Any]] = []
+        self.rejected = 0
+        CIRCUIT_STATE.set(_STATE_VALUES[self.state])
+
+    @classmethod
+    def from_config(cls, breaker_config: Dict[str, Any]) -> Optional["CircuitBreaker"]:
+        """
+        根据配置创建熔断器
+
+        Args:
+            breaker_config: 熔断配置（circuit_breaker）
+
+        Returns:
+            CircuitBreaker，未启用时返回 None
+        """
+        if not breaker_config.get("enabled", False):
+            return None
+        return cls(
+            failure_threshold=breaker_config.get("failure_threshold", 5),
+            recovery_timeout=breaker_config.get("recovery_timeout", 30.0),
+            half_open_max_calls=breaker_config.get("half_open_max_calls", 1),
+            mode=breaker_config.get("mode", MODE_PARK),
+            max_park_seconds=breaker_config.get("max_park_seconds", 600.0),
+        )
+
+    def _set_state(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state])
+        self._cond.notify_all()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        if self.state == STATE_CLOSED:
+            self._outages.append({"start": time.time(), "end": None})
+            print(
+                f"熔断器打开: 连续 {self._failures} 次请求失败，"
+                f"{self.recovery_timeout:g} 秒后探测服务是否恢复"
+            )
+        else:
+            print(f"探测失败，熔断器重新打开，{self.recovery_timeout:g} 秒后再次探测")
+        self._set_state(STATE_OPEN)
+
+    def _close(self):
+        outage = self._outages[-1] if self._outages else None
+        if outage is not None and outage["end"] is None:
+            outage["end"] = time.time()
+            print(f"服务已恢复，熔断器关闭（中断 {outage['end'] - outage['start']:.0f} 秒）")
+        self._set_state(STATE_CLOSED)
+
+    def before_request(self):
+        """
+        发送请求前调用：熔断器打开时挂起等待或快速失败
+
+        Raises:
+            CircuitOpenError: fail_fast 模式下熔断器未关闭，或 park 模式下挂起超时
+        """
+        deadline = time.monotonic() + self.max_park_seconds
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.state == STATE_OPEN and now - self._opened_at >= self.recovery_timeout:
+                    print("熔断器半开: 发送探测请求")
+                    self._probes = 0
+                    self._set_state(STATE_HALF_OPEN)
+                if self.state == STATE_CLOSED:
+                    return
+                if self.state == STATE_HALF_OPEN and self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    return
+
+                if self.mode == MODE_FAIL_FAST or now >= deadline:
+                    self.rejected += 1
+                    CIRCUIT_REJECTED.inc()
+                    raise CircuitOpenError("服务不可用（熔断器已打开），请求未发送")
+
+                wait = deadline - now
+                if self.state == STATE_OPEN:
+                    wait = min(wait, self._opened_at + self.recovery_timeout - now)
+                self._cond.wait(max(wait, 0.01))
+
+    def record(self, error: Optional[OCRAPIError] = None):
+        """
+        请求结束后调用，记录结果
+
+        Args:
+            error: 分类后的错误，成功时为 None；
+                   服务端有响应的错误（4xx、error_code）视为服务可用，
+                   未发出请求的本地错误不影响熔断状态
+        """
+        with self._cond:
+            if self.state == STATE_HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+            if error is not None and is_outage_error(error):
+                self._failures += 1
+                if self.state == STATE_HALF_OPEN or (
+                    self.state == STATE_CLOSED and self._failures >= self.failure_threshold
+                ):
+                    self._open()
+            elif error is None or error.status is not None or error.error_code is not None:
+                self._failures = 0
+                if self.state != STATE_CLOSED:
+                    self._close()
+            self._cond.notify_all()
+
+    def outages_since(self, since: float) -> List[Dict[str, Any]]:
+        """
+        导出指定时间之后（含仍在持续）的中断时段
+
+        Args:
+            since: 起始时间戳（time.time()）
+
+        Returns:
+            [{"start", "end", "seconds"}]，时间为本地时间字符串，仍在中断时 end 为 None
+        """
+        with self._cond:
+            outages = [
+                dict(outage) for outage in self._outages
+                if outage["end"] is None or outage["end"] >= since
+            ]
+        now = time.time()
+        return [
+            {
+                "start": _format_time(outage["start"]),
+                "end": _format_time(outage["end"]) if outage["end"] is not None else None,
+                "seconds": round((outage["end"] or now) - outage["start"], 1),
+            }
+            for outage in outages
+        ]
@@ -6,7 +6,7 @@ PaddleOCR-VL 配置文件加载器
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 DEFAULT_CONFIG_PATH = Path(__file__).parent / "config.yaml"
 DEFAULT_ENV_PATH = Path(__file__).parent / ".env"
@@ -43,6 +43,35 @@ def load_env_file(env_path: Optional[Path] = None) -> Dict[str, str]:
     return env_vars
 
 
+def parse_endpoints(urls: str, tokens: str = "") -> List[Dict[str, Any]]:
+    """
+    解析逗号分隔的部署地址与 Token
+
+    Args:
+        urls: 逗号分隔的 API 地址
+        tokens: 逗号分隔的 Token，与地址一一对应；只有一个时所有地址共用，
+                为空时使用 PADDLEOCR_TOKEN
+
+    Returns:
+        [{"url", "token"}]，未指定 Token 的项不含 token
+    """
+    url_list = [u.strip() for u in urls.split(",") if u.strip()]
+    token_list = [t.strip() for t in tokens.split(",") if t.strip()]
+    if len(token_list) == 1:
+        token_list = token_list * len(url_list)
+    if token_list and len(token_list) != len(url_list):
+        raise ValueError(
+            f"PADDLEOCR_TOKENS 数量（{len(token_list)}）与 PADDLEOCR_API_URLS 数量（{len(url_list)}）不一致"
+        )
+    endpoints = []
+    for i, url in enumerate(url_list):
+        entry = {"url": url}
+        if token_list:
+            entry["token"] = token_list[i]
+        endpoints.append(entry)
+    return endpoints
+
+
 def load_config(config_path: Optional[Path] = None, env_path: Optional[Path] = None) -> Dict[str, Any]:
     """
     加载 YAML 配置文件，并自动合并 .env 文件中的配置
@@ -75,6 +104,16 @@ def load_config(config_path: Optional[Path] = None, env_path: Optional[Path] = N
         # 从 .env 读取 PADDLEOCR_API_URL（如果设置）
         if "PADDLEOCR_API_URL" in env_vars:
             api_config["base_url"] = env_vars["PADDLEOCR_API_URL"]
+        # 从 .env 读取 PADDLEOCR_API_URLS / PADDLEOCR_TOKENS（多个部署地址，逗号分隔）
+        if "PADDLEOCR_API_URLS" in env_vars:
+            api_config["endpoints"] = parse_endpoints(
+                env_vars["PADDLEOCR_API_URLS"], env_vars.get("PADDLEOCR_TOKENS", "")
+            )
+        elif "PADDLEOCR_TOKENS" in env_vars:
+            # 只配置了多个 Token：同一地址上轮换使用（Token 池）
+            config.setdefault("token_pool", {})["tokens"] = [
+                t.strip() for t in env_vars["PADDLEOCR_TOKENS"].split(",") if t.strip()
+            ]
         # 从 .env 读取 PADDLEOCR_TIMEOUT（如果设置）
         if "PADDLEOCR_TIMEOUT" in env_vars:
             api_config["timeout"] = int(env_vars["PADDLEOCR_TIMEOUT"])
@@ -82,6 +121,22 @@ def load_config(config_path: Optional[Path] = None, env_path: Optional[Path] = N
         if "PADDLEOCR_MAX_RETRIES" in env_vars:
             api_config["max_retries"] = int(env_vars["PADDLEOCR_MAX_RETRIES"])
 
+    # 合并批量处理配置
+    if "PADDLEOCR_WORKERS" in env_vars:
+        config.setdefault("batch", {})["workers"] = int(env_vars["PADDLEOCR_WORKERS"])
+
+    # 合并限速配置
+    if "PADDLEOCR_QPS" in env_vars:
+        config.setdefault("rate_limit", {})["qps"] = float(env_vars["PADDLEOCR_QPS"])
+    if "PADDLEOCR_DAILY_QUOTA" in env_vars:
+        config.setdefault("rate_limit", {})["daily_quota"] = int(env_vars["PADDLEOCR_DAILY_QUOTA"])
+
+    # 合并指标导出配置
+    if "PADDLEOCR_METRICS_PORT" in env_vars:
+        config.setdefault("metrics", {})["port"] = int(env_vars["PADDLEOCR_METRICS_PORT"])
+    if "PADDLEOCR_METRICS_TEXTFILE" in env_vars:
+        config.setdefault("metrics", {})["textfile"] = env_vars["PADDLEOCR_METRICS_TEXTFILE"]
+
     return config
 
 
@@ -178,6 +233,149 @@ def get_output_config(config: Dict[str, Any]) -> Dict[str, Any]:
     return config.get("output", {})
 
 
+def get_batch_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取批量处理配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        批量处理配置字典
+    """
+    return config.get("batch", {})
+
+
+def get_cache_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取结果缓存配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        缓存配置字典
+    """
+    return config.get("cache") or {}
+
+
+def get_pdf_split_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取 PDF 分段处理配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        PDF 分段配置字典
+    """
+    return config.get("pdf_split") or {}
+
+
+def get_preprocess_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取图片预处理配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        图片预处理配置字典
+    """
+    return config.get("preprocess") or {}
+
+
+def get_tiff_split_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取多页 TIFF 拆分配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        多页 TIFF 拆分配置字典
+    """
+    return config.get("tiff_split") or {}
+
+
+def get_token_pool_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取 Token 池配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        Token 池配置字典
+    """
+    return config.get("token_pool") or {}
+
+
+def get_hedging_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取对冲请求配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        对冲请求配置字典
+    """
+    return config.get("hedging") or {}
+
+
+def get_circuit_breaker_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取熔断器配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        熔断器配置字典
+    """
+    return config.get("circuit_breaker") or {}
+
+
+def get_rate_limit_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取请求限速配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        限速配置字典
+    """
+    return config.get("rate_limit") or {}
+
+
+def get_retry_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取重试策略配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        重试配置字典
+    """
+    return config.get("retry") or {}
+
+
+def get_metrics_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    获取指标导出配置
+
+    Args:
+        config: 完整配置字典
+
+    Returns:
+        指标配置字典
+    """
+    return config.get("metrics") or {}
+
+
 def get_token_from_config(config: Dict[str, Any]) -> Optional[str]:
     """
     从配置中获取 Token（已从 .env 文件合并）
@@ -192,19 +390,32 @@ def get_token_from_config(config: Dict[str, Any]) -> Optional[str]:
     return api_config.get("token")
 
 
-def load_mode_config(mode: str = "标准", config_path: Optional[Path] = None) -> Dict[str, Any]:
+def build_mode_config(config: Dict[str, Any], mode: str = "标准") -> Dict[str, Any]:
     """
-    加载指定模式的完整配置（预设 + 用户自定义）
+    基于已加载的配置构建指定模式的完整配置（预设 + 用户自定义）
 
     Args:
+        config: 完整配置字典
         mode: 预设模式名称（快速/标准/精细）
-        config_path: 配置文件路径
 
     Returns:
         合并后的配置字典
     """
-    config = load_config(config_path)
     preset_config = get_preset_config(config, mode)
     user_options = config.get("options", {})
 
     return merge_options(preset_config, user_options)
+
+
+def load_mode_config(mode: str = "标准", config_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    加载指定模式的完整配置（预设 + 用户自定义）
+
+    Args:
+        mode: 预设模式名称（快速/标准/精细）
+        config_path: 配置文件路径
+
+    Returns:
+        合并后的配置字典
+    """
+    return build_mode_config(load_config(config_path), mode)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 多地址负载均衡
+在多个部署地址（各自使用自己的 Token）之间分配请求：
+按在途请求数最少或按延迟加权路由，连续失败的地址暂时摘除，到期后自动放回
+"""
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from circuit_breaker import is_outage_error
+from metrics import ENDPOINT_EJECTIONS, ENDPOINT_REQUESTS
+from rate_limiter import TokenBucket
+from retry_policy import OCRAPIError
+
+# 路由策略
+ROUTING_LEAST_OUTSTANDING = "least_outstanding"
+ROUTING_LATENCY_WEIGHTED = "latency_weighted"
+
+# 延迟的指数加权平均系数
+EWMA_ALPHA = 0.3
+
+
+class Endpoint:
+    """单个部署地址及其运行状态"""
+
+    def __init__(self, url: str, token: str, rate_limiter: Optional[TokenBucket] = None):
+        """
+        Args:
+            url: API 地址
+            token: 该地址使用的 Token
+            rate_limiter: 该 Token 的请求限速器，为空时不限速
+        """
+        self.url = url
+        self.token = token
+        self.rate_limiter = rate_limiter
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+
+    def healthy(self, now: float) -> bool:
+        """是否可以接收请求（未被摘除或摘除已到期）"""
+        return now >= self.ejected_until
+
+
+class EndpointPool:
+    """
+    部署地址池（线程安全）
+
+    - 尚无延迟样本的地址优先（在途请求最少者），每个地址都能尽快得到样本
+    - least_outstanding：选择在途请求最少的地址，相同时选择延迟较低的，仍相同时轮流选择
+    - latency_weighted：按 1 / (平均延迟 × (在途请求数 + 1)) 加权随机选择
+    - 连续 eject_after 次服务端失败（超时、连接错误、5xx）后摘除 eject_seconds 秒；
+      到期后重新放行，再次失败立即摘除
+    - 全部地址都被摘除时，选择最早到期的地址，不阻塞请求
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        routing: str = ROUTING_LEAST_OUTSTANDING,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            endpoints: 部署地址列表
+            routing: 路由策略 least_outstanding | latency_weighted
+            eject_after: 摘除地址所需的连续失败次数
+            eject_seconds: 摘除时长（秒）
+            rng: 随机数生成器（便于复现）
+        """
+        if not endpoints:
+            raise ValueError("部署地址列表为空")
+        if routing not in (ROUTING_LEAST_OUTSTANDING, ROUTING_LATENCY_WEIGHTED):
+            raise ValueError(
+                f"路由策略无效: {routing}，可选: {ROUTING_LEAST_OUTSTANDING} | {ROUTING_LATENCY_WEIGHTED}"
+            )
+        self.endpoints = endpoints
+        self.routing = routing
+        self.eject_after = max(1, int(eject_after))
+        self.eject_seconds = eject_seconds
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        api_config: Dict[str, Any],
+        default_token: Optional[str],
+        rate_limit_config: Optional[Dict[str, Any]] = None,
+    ) -> Optional["EndpointPool"]:
+        """
+        根据配置创建地址池
+
+        Args:
+            api_config: API 配置（endpoints, routing, eject_after, eject_seconds）
+            default_token: 未单独指定 Token 的地址使用的 Token
+            rate_limit_config: 限速配置，按各地址的 Token 分别限速
+
+        Returns:
+            EndpointPool，未配置 endpoints 时返回 None（使用单一的 base_url）
+        """
+        entries = api_config.get("endpoints") or []
+        if not entries:
+            return None
+        endpoints = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            token = entry.get("token") or default_token
+            if not entry.get("url"):
+                raise ValueError(f"部署地址缺少 url: {entry}")
+            if not token:
+                raise ValueError(f"部署地址未设置 Token: {entry['url']}")
+            rate_limiter = TokenBucket.from_config(rate_limit_config, token) if rate_limit_config else None
+            endpoints.append(Endpoint(entry["url"], token, rate_limiter))
+        return cls(
+            endpoints,
+            routing=api_config.get("routing", ROUTING_LEAST_OUTSTANDING),
+            eject_after=api_config.get("eject_after", 3),
+            eject_seconds=api_config.get("eject_seconds", 30.0),
+        )
+
+    def _round_robin(self, tied: List[Endpoint]) -> Endpoint:
+        """在条件相同的地址之间轮流选择，避免总是选中列表中的第一个"""
+        endpoint = tied[self._turn % len(tied)]
+        self._turn += 1
+        return endpoint
+
+    def _choose(self, candidates: List[Endpoint]) -> Endpoint:
+        unsampled = [e for e in candidates if e.latency is None]
+        if unsampled:
+            fewest = min(e.outstanding for e in unsampled)
+            return self._round_robin([e for e in unsampled if e.outstanding == fewest])
+        if self.routing == ROUTING_LEAST_OUTSTANDING:
+            best = min((e.outstanding, e.latency) for e in candidates)
+            return self._round_robin([e for e in candidates if (e.outstanding, e.latency) == best])
+        weights = [1.0 / (max(e.latency, 1e-3) * (e.outstanding + 1)) for e in candidates]
+        return self._rng.choices(candidates, weights=weights)[0]
+
+    def acquire(self) -> Endpoint:
+        """
+        选择一个地址发送请求，请求结束后必须调用 release()
+
+        Returns:
+            Endpoint
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e.healthy(now)]
+            if candidates:
+                endpoint = self._choose(candidates)
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        latency: Optional[float] = None,
+        error: Optional[OCRAPIError] = None,
+    ):
+        """
+        请求结束，记录结果
+
+        Args:
+            endpoint: acquire() 返回的地址
+            latency: 成功请求的耗时（秒）
+            error: 分类后的错误，成功时为 None
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.failures = 0
+                if latency is not None:
+                    if endpoint.latency is None:
+                        endpoint.latency = latency
+                    else:
+                        endpoint.latency += EWMA_ALPHA * (latency - endpoint.latency)
+                ENDPOINT_REQUESTS.inc(endpoint=endpoint.url, outcome="success")
+                return
+
+            endpoint.errors += 1
+            ENDPOINT_REQUESTS.inc(endpoint=endpoint.url, outcome="error")
+            if not is_outage_error(error):
+                # 服务端有响应（4xx、error_code），地址本身可用
+                if error.status is not None or error.error_code is not None:
+                    endpoint.failures = 0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.eject_after:
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                endpoint.ejections += 1
+                ENDPOINT_EJECTIONS.inc(endpoint=endpoint.url)
+                print(
+                    f"部署地址连续 {endpoint.failures} 次失败，摘除 {self.eject_seconds:g} 秒: {endpoint.url}"
+                )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        导出各地址的运行统计
+
+        Returns:
+            [{"url", "requests", "errors", "ejections", "latency"}]
+        """
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "ejections": e.ejections,
+                    "latency": round(e.latency, 3) if e.latency is not None else None,
+                }
+                for e in self.endpoints
+            ]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 文件与参数指纹
+用于结果缓存、断点续跑等需要判断“同一文件 + 同一参数”的场景
+"""
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+# 分块读取大小，避免大文件一次性读入内存
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    计算文件内容的 SHA-256
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def options_hash(ocr_config: Optional[Dict[str, Any]]) -> str:
+    """
+    计算 OCR 参数的规范化摘要（键排序，忽略值为 None 的参数）
+
+    Args:
+        ocr_config: OCR 参数配置（load_mode_config 的合并结果）
+
+    Returns:
+        十六进制摘要
+    """
+    options = {k: v for k, v in (ocr_config or {}).items() if v is not None}
+    canonical = json.dumps(options, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def processing_options(
+    ocr_config: Optional[Dict[str, Any]],
+    preprocess_config: Optional[Dict[str, Any]] = None,
+    pages_per_chunk: Optional[int] = None,
+    tiff_split_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    合并 OCR 参数与会改变上传内容的本地处理设置，作为摘要的输入
+    本地处理均未启用时原样返回 ocr_config，已有的缓存、断点日志与输出清单仍然有效
+
+    Args:
+        ocr_config: OCR 参数配置
+        preprocess_config: 图片预处理配置（preprocess）
+        pages_per_chunk: PDF 分段页数，为空表示整份提交
+        tiff_split_config: 多页 TIFF 拆分配置（tiff_split）
+
+    Returns:
+        参数字典，本地处理设置以下划线开头的键附加，不会与 API 参数冲突
+    """
+    options = dict(ocr_config or {})
+    preprocess_config = preprocess_config or {}
+    if preprocess_config.get("resize", False):
+        # 缩放尺寸由 ocr_config 中的 maxPixels / minPixels 决定
+        options["_resize"] = True
+    if preprocess_config.get("recompress", False):
+        options["_recompress"] = {
+            key: preprocess_config.get(key)
+            for key in ("formats", "quality", "quality_floor", "max_bytes")
+        }
+    if pages_per_chunk:
+        options["_pagesPerChunk"] = pages_per_chunk
+    if tiff_split_config and tiff_split_config.get("enabled", False):
+        options["_tiffBundleMaxBytes"] = tiff_split_config.get("bundle_max_bytes")
+    return options
+
+
+def document_key(file_path: str, ocr_config: Optional[Dict[str, Any]]) -> str:
+    """
+    计算“文件内容 + OCR 参数”的组合键
+
+    Args:
+        file_path: 文件路径
+        ocr_config: OCR 参数配置
+
+    Returns:
+        十六进制摘要
+    """
+    combined = f"{file_sha256(file_path)}:{options_hash(ocr_config)}"
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
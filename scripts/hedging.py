@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 对冲请求
+请求超过近期延迟的指定分位数仍未返回时，再发送一个相同的请求，先完成者生效；
+少量长尾请求不再拖慢整个批次，对冲比例有上限，配额消耗可控
+"""
+import queue
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+from metrics import HEDGED_REQUESTS, HEDGE_WINS, percentile
+from stage_timer import StageTimings
+
+# 请求来源
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+class Hedger:
+    """
+    对冲请求控制器（线程安全）
+
+    - 记录最近 window 次成功尝试的耗时（不含重试退避），样本数达到 min_samples 后启用对冲；
+      样本由发送函数通过 observe() 上报
+    - 请求耗时超过 p{percentile}（不低于 min_delay）时发送一个对冲请求
+    - 对冲次数不超过 max_ratio × 请求数
+    - 落后的请求不会被中断，完成后结果丢弃
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_delay: float = 1.0,
+        max_ratio: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        """
+        Args:
+            percentile: 触发对冲的延迟分位数（0~100）
+            min_delay: 最短对冲等待时间（秒），避免延迟很低时频繁对冲
+            max_ratio: 对冲请求数与请求数之比的上限
+            min_samples: 启用对冲所需的最少延迟样本数
+            window: 计算分位数使用的最近请求数
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.min_samples = max(1, int(min_samples))
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=max(self.min_samples, int(window)))
+        self.requests = 0
+        self.hedged = 0
+        self.wins: Dict[str, int] = {PRIMARY: 0, HEDGE: 0}
+
+    @classmethod
+    def from_config(cls, hedging_config: Dict[str, Any]) -> Optional["Hedger"]:
+        """
+        根据配置创建对冲控制器
+
+        Args:
+            hedging_config: 对冲配置（hedging）
+
+        Returns:
+            Hedger，未启用时返回 None
+        """
+        if not hedging_config.get("enabled", False):
+            return None
+        return cls(
+            percentile=hedging_config.get("percentile", 95),
+            min_delay=hedging_config.get("min_delay", 1.0),
+            max_ratio=hedging_config.get("max_ratio", 0.05),
+            min_samples=hedging_config.get("min_samples", 20),
+            window=hedging_config.get("window", 200),
+        )
+
+    def observe(self, latency: float):
+        """记录一次成功尝试的请求耗时"""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        当前的对冲等待时间
+
+        Returns:
+            秒数，样本不足时返回 None（不对冲）
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            return max(self.min_delay, percentile(self._latencies, self.percentile))
+
+    def _try_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedged += 1
+        HEDGED_REQUESTS.inc()
+        return True
+
+    def call(
+        self,
+        send: Callable[[Optional[StageTimings]], Dict[str, Any]],
+        label: str,
+        timings: Optional[StageTimings] = None,
+    ) -> Dict[str, Any]:
+        """
+        发送请求，超过对冲等待时间仍未返回时再发送一个相同的请求
+
+        Args:
+            send: 发送一次请求（含重试）的函数，参数为该请求使用的分阶段统计
+            label: 日志中显示的请求名称（通常为文件路径）
+            timings: 分阶段统计，只合并先完成的请求的耗时
+
+        Returns:
+            先成功的请求的结果
+
+        Raises:
+            两个请求都失败时抛出先失败的请求的异常
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.hedge_delay()
+        if delay is None or self.max_ratio <= 0:
+            # 不会触发对冲：直接在当前线程发送
+            return send(timings)
+        results = queue.Queue()
+
+        def run(source: str):
+            own_timings = StageTimings() if timings is not None else None
+            try:
+                result = send(own_timings)
+            except BaseException as e:
+                results.put((source, None, e, own_timings))
+                return
+            results.put((source, result, None, own_timings))
+
+        threading.Thread(target=run, args=(PRIMARY,), daemon=True).start()
+        pending = 1
+        hedged = False
+        try:
+            outcome = results.get(timeout=delay)
+        except queue.Empty:
+            if self._try_hedge():
+                print(f"请求超过 {delay:.1f} 秒未返回，发送对冲请求: {label}")
+                threading.Thread(target=run, args=(HEDGE,), daemon=True).start()
+                pending += 1
+                hedged = True
+            outcome = results.get()
+        pending -= 1
+
+        first_error = None
+        while True:
+            source, result, error, own_timings = outcome
+            if error is None:
+                if hedged:
+                    with self._lock:
+                        self.wins[source] += 1
+                    HEDGE_WINS.inc(winner=source)
+                if timings is not None:
+                    timings.merge(own_timings.to_dict())
+                return result
+            first_error = first_error or error
+            if not pending:
+                raise first_error
+            outcome = results.get()
+            pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        导出运行统计
+
+        Returns:
+            {"requests", "hedged", "wins"}
+        """
+        with self._lock:
+            return {"requests": self.requests, "hedged": self.hedged, "wins": dict(self.wins)}
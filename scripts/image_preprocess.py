@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 图片预处理
+上传前在本地按预设的 max_pixels 缩小图片（不低于 min_pixels），
+并将 BMP、未压缩 TIFF 等体积较大的图片重新编码为 PNG / JPEG / WebP 中最小的一种，
+减少上传字节数、请求耗时与服务端解码时间
+依赖 Pillow（可选）：pip install Pillow
+"""
+import io
+import math
+import os
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+
+# 重新编码的默认候选格式
+DEFAULT_FORMATS = ("png", "jpeg", "webp")
+# PNG 可以直接保存的图片模式
+PNG_MODES = {"1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"}
+
+
+def _require_pillow():
+    """检查 Pillow 是否已安装"""
+    if Image is None:
+        raise ImportError("图片预处理需要安装 Pillow: pip install Pillow")
+
+
+def target_size(
+    width: int,
+    height: int,
+    max_pixels: Optional[int],
+    min_pixels: Optional[int] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    计算按像素上限等比缩小后的尺寸
+
+    Args:
+        width: 原始宽度
+        height: 原始高度
+        max_pixels: 像素数上限，为空时不缩小
+        min_pixels: 像素数下限，缩小后不低于该值（只缩小不放大）
+
+    Returns:
+        (宽, 高)，不需要缩小时返回 None
+    """
+    if not max_pixels:
+        return None
+    limit = max(max_pixels, min_pixels or 0)
+    if width * height <= limit:
+        return None
+    scale = math.sqrt(limit / (width * height))
+    new_width = max(1, int(width * scale))
+    new_height = max(1, int(height * scale))
+    if min_pixels and new_width * new_height < min_pixels:
+        new_width = max(1, math.ceil(width * scale))
+        new_height = max(1, math.ceil(height * scale))
+    return new_width, new_height
+
+
+def _encode(image, image_format: str, quality: Optional[int] = None) -> bytes:
+    """
+    按指定格式编码图片
+
+    Args:
+        image: PIL 图片
+        image_format: PNG | JPEG | WEBP
+        quality: 有损编码的质量（1~100）
+
+    Returns:
+        编码后的内容
+    """
+    buffer = io.BytesIO()
+    if image_format == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            image = _flatten(image)
+        image.save(buffer, format="JPEG", quality=quality or 95)
+    elif image_format == "WEBP":
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(buffer, format="WEBP", quality=quality or 95, method=4)
+    else:
+        if image.mode not in PNG_MODES:
+            # CMYK、YCbCr 等模式 PNG 无法保存
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def _flatten(image):
+    """去除透明通道（铺白底），转换为 JPEG 支持的模式"""
+    if "A" in image.getbands() or image.mode == "P":
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("L" if image.mode in ("1", "I", "I;16", "F") else "RGB")
+
+
+def needs_recompress(image, nbytes: int, preprocess_config: Dict[str, Any]) -> bool:
+    """
+    判断图片是否值得重新编码：BMP、未压缩的 TIFF，或超过字节预算（max_bytes）
+
+    Args:
+        image: PIL 图片
+        nbytes: 原文件大小
+        preprocess_config: 预处理配置
+
+    Returns:
+        是否重新编码
+    """
+    if image.format == "BMP":
+        return True
+    if image.format == "TIFF" and image.info.get("compression") in (None, "raw"):
+        return True
+    max_bytes = preprocess_config.get("max_bytes")
+    return bool(max_bytes) and nbytes > max_bytes
+
+
+def smallest_encoding(image, preprocess_config: Dict[str, Any]) -> Tuple[bytes, str, Optional[int]]:
+    """
+    用候选格式分别编码，返回最小的结果
+    有损格式（JPEG/WebP）从 quality 开始，超出 max_bytes 时每次降低 5，不低于 quality_floor；
+    编码失败的格式（如 Pillow 未编译 WebP 支持）跳过，使用其余候选
+
+    Args:
+        image: PIL 图片
+        preprocess_config: 预处理配置（formats, quality, quality_floor, max_bytes）
+
+    Returns:
+        (编码后的内容, 格式, 质量)，PNG 的质量为 None
+
+    Raises:
+        ValueError: formats 中有不支持的格式
+        OSError: 所有候选格式都编码失败
+    """
+    formats = [f.upper() for f in preprocess_config.get("formats") or DEFAULT_FORMATS]
+    formats = ["JPEG" if f == "JPG" else f for f in formats]
+    quality = int(preprocess_config.get("quality", 90))
+    floor = min(quality, int(preprocess_config.get("quality_floor", 75)))
+    max_bytes = preprocess_config.get("max_bytes")
+
+    best: Optional[Tuple[bytes, str, Optional[int]]] = None
+    errors = []
+    for image_format in formats:
+        if image_format == "PNG":
+            candidates = [None]
+        elif image_format in ("JPEG", "WEBP"):
+            candidates = list(range(quality, floor - 1, -5))
+            if candidates[-1] != floor:
+                candidates.append(floor)
+        else:
+            raise ValueError(f"不支持的图片编码格式: {image_format}（可选 png/jpeg/webp）")
+        for q in candidates:
+            try:
+                data = _encode(image, image_format, q)
+            except (OSError, KeyError, ValueError) as e:
+                errors.append(f"{image_format}: {e}")
+                break
+            if best is None or len(data) < len(best[0]):
+                best = (data, image_format, q)
+            if not max_bytes or len(data) <= max_bytes:
+                break
+    if best is None:
+        raise OSError(f"图片编码失败（{'；'.join(errors)}）")
+    return best
+
+
+def preprocess_enabled(preprocess_config: Dict[str, Any]) -> bool:
+    """是否启用了任一预处理步骤"""
+    return bool(preprocess_config.get("resize", False) or preprocess_config.get("recompress", False))
+
+
+def _format_size(nbytes: int) -> str:
+    return f"{nbytes / 1024 / 1024:.1f} MB" if nbytes >= 1024 * 1024 else f"{nbytes / 1024:.0f} KB"
+
+
+def resize_page(image, preprocess_config: Dict[str, Any], ocr_config: Optional[Dict[str, Any]] = None):
+    """
+    按配置缩小单页图片（用于从多页文件中拆出的页面）
+
+    Args:
+        image: PIL 图片
+        preprocess_config: 预处理配置
+        ocr_config: OCR 参数配置（maxPixels, minPixels）
+
+    Returns:
+        缩小后的图片，未启用 resize 或不需要缩小时返回原图片
+    """
+    if not preprocess_config.get("resize", False):
+        return image
+    ocr_config = ocr_config or {}
+    size = target_size(image.width, image.height, ocr_config.get("maxPixels"), ocr_config.get("minPixels"))
+    return image.resize(size, Image.LANCZOS) if size is not None else image
+
+
+def encode_page(image, preprocess_config: Dict[str, Any]) -> bytes:
+    """
+    编码单页图片：启用 recompress 时选择最小的编码，否则使用无损的 PNG
+
+    Args:
+        image: PIL 图片
+        preprocess_config: 预处理配置
+
+    Returns:
+        编码后的内容
+    """
+    if preprocess_config.get("recompress", False):
+        return smallest_encoding(image, preprocess_config)[0]
+    return _encode(image, "PNG")
+
+
+def preprocess_image(
+    file_path: str,
+    preprocess_config: Dict[str, Any],
+    ocr_config: Optional[Dict[str, Any]] = None,
+) -> Optional[bytes]:
+    """
+    按配置预处理图片：按 max_pixels 缩小（resize），重新编码为最小的格式（recompress）
+    预处理只是优化：读取或编码失败时打印警告并上传原文件，不会让识别失败
+
+    Args:
+        file_path: 图片路径
+        preprocess_config: 预处理配置（preprocess）
+        ocr_config: OCR 参数配置（maxPixels, minPixels）
+
+    Returns:
+        处理后的图片内容，未做任何处理（或处理后不比原文件小、处理失败）时返回 None（直接上传原文件）
+
+    Raises:
+        ImportError: 启用了预处理但未安装 Pillow
+    """
+    if not preprocess_enabled(preprocess_config):
+        return None
+    _require_pillow()
+    try:
+        return _preprocess_image(file_path, preprocess_config, ocr_config or {})
+    except Exception as e:
+        print(f"警告: 图片预处理失败，上传原文件: {file_path}: {e}")
+        return None
+
+
+def _preprocess_image(
+    file_path: str,
+    preprocess_config: Dict[str, Any],
+    ocr_config: Dict[str, Any],
+) -> Optional[bytes]:
+    """preprocess_image 的实现，异常由调用方处理"""
+    max_pixels = ocr_config.get("maxPixels") if preprocess_config.get("resize", False) else None
+    min_pixels = ocr_config.get("minPixels")
+
+    original_size = os.path.getsize(file_path)
+    with Image.open(file_path) as image:
+        # 多页 TIFF 整体上传或由 tiff_split 按页拆分，不在此处理
+        if getattr(image, "n_frames", 1) > 1:
+            return None
+        source_format = image.format
+        resize = target_size(image.width, image.height, max_pixels, min_pixels) is not None
+        recompress = preprocess_config.get("recompress", False) and needs_recompress(
+            image, original_size, preprocess_config
+        )
+        if not resize and not recompress:
+            return None
+
+        # 按 EXIF 方向旋转后再处理，重新编码会丢失方向信息
+        image = ImageOps.exif_transpose(image)
+        if resize:
+            size = target_size(image.width, image.height, max_pixels, min_pixels)
+            print(f"图片缩小: {file_path}（{image.width}x{image.height} -> {size[0]}x{size[1]}）")
+            image = image.resize(size, Image.LANCZOS)
+        else:
+            image.load()
+
+    if recompress:
+        data, image_format, quality = smallest_encoding(image, preprocess_config)
+        if not resize and len(data) >= original_size:
+            return None
+        label = image_format if quality is None else f"{image_format} q{quality}"
+        print(
+            f"图片重新编码: {file_path}（{source_format} {_format_size(original_size)}"
+            f" -> {label} {_format_size(len(data))}）"
+        )
+        return data
+    # 只缩小：JPEG 仍以 JPEG 上传，其余格式使用无损的 PNG
+    return _encode(image, "JPEG" if source_format == "JPEG" else "PNG")
@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 运行指标
+以 Prometheus 文本格式导出计数器、瞬时值与直方图，无需额外依赖；
+可通过本地 /metrics HTTP 端点供 Prometheus 抓取，
+或写入 node-exporter textfile collector 目录
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 请求与阶段耗时的直方图分桶（秒），覆盖毫秒级本地操作到数分钟的长文档推理
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """
+    线性插值计算分位数
+
+    Args:
+        values: 样本
+        pct: 分位数（0~100）
+
+    Returns:
+        分位数值，样本为空时返回 None
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class _Metric:
+    """指标基类：按标签值分组保存数据"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _label_values(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        增加计数
+
+        Args:
+            amount: 增量（不能为负）
+            **labels: 标签值
+        """
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """读取当前计数"""
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def _render_samples(self, items) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        """
+        设置当前值
+
+        Args:
+            value: 当前值
+            **labels: 标签值
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _render_samples(self, items) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """直方图：累计分桶计数、总和与次数"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值
+            **labels: 标签值
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """创建并注册计数器"""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """创建并注册瞬时值指标"""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """创建并注册直方图"""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文本格式导出全部指标
+
+        Returns:
+            指标文本
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 默认注册表与内置指标
+REGISTRY = MetricsRegistry()
+
+API_REQUESTS = REGISTRY.counter(
+    "paddleocr_api_requests_total",
+    "API 请求次数（每次尝试计一次），按结果分类",
+    ["outcome"],
+)
+API_RETRIES = REGISTRY.counter(
+    "paddleocr_api_retries_total",
+    "失败后进行重试的次数",
+)
+RETRIES_DENIED = REGISTRY.counter(
+    "paddleocr_api_retries_denied_total",
+    "因批次重试预算用完而放弃的重试次数",
+)
+API_TIMEOUTS = REGISTRY.counter(
+    "paddleocr_api_timeouts_total",
+    "API 请求超时次数",
+)
+API_HTTP_ERRORS = REGISTRY.counter(
+    "paddleocr_api_http_errors_total",
+    "API 返回的 HTTP 错误状态码次数（429 表示限流或配额耗尽）",
+    ["status"],
+)
+API_ERROR_CODES = REGISTRY.counter(
+    "paddleocr_api_error_code_total",
+    "API 响应中 error_code 的出现次数",
+    ["error_code"],
+)
+API_BYTES_SENT = REGISTRY.counter(
+    "paddleocr_api_bytes_sent_total",
+    "发送的请求体字节数",
+)
+API_BYTES_RECEIVED = REGISTRY.counter(
+    "paddleocr_api_bytes_received_total",
+    "接收的 API 响应体字节数",
+)
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "paddleocr_api_request_duration_seconds",
+    "单次 API 请求耗时（上传、推理与接收响应）",
+)
+IMAGES_DOWNLOADED = REGISTRY.counter(
+    "paddleocr_images_downloaded_total",
+    "图片下载次数，按结果分类",
+    ["outcome"],
+)
+IMAGE_BYTES = REGISTRY.counter(
+    "paddleocr_image_bytes_total",
+    "下载的图片字节数",
+)
+DOCUMENTS = REGISTRY.counter(
+    "paddleocr_documents_total",
+    "处理完成的文档数，按结果分类",
+    ["outcome"],
+)
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "paddleocr_concurrency_limit",
+    "自适应并发控制当前允许的在途请求数",
+)
+CONCURRENCY_DECREASES = REGISTRY.counter(
+    "paddleocr_concurrency_decreases_total",
+    "自适应并发控制因拥塞缩减上限的次数，按原因分类",
+    ["reason"],
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.counter(
+    "paddleocr_rate_limit_wait_seconds_total",
+    "发送前因客户端限速而等待的累计秒数",
+)
+ENDPOINT_REQUESTS = REGISTRY.counter(
+    "paddleocr_endpoint_requests_total",
+    "各部署地址的请求次数，按结果分类",
+    ["endpoint", "outcome"],
+)
+ENDPOINT_EJECTIONS = REGISTRY.counter(
+    "paddleocr_endpoint_ejections_total",
+    "部署地址因连续失败被摘除的次数",
+    ["endpoint"],
+)
+COALESCED_REQUESTS = REGISTRY.counter(
+    "paddleocr_coalesced_requests_total",
+    "与进行中的相同文件合并、未单独发送的请求数",
+)
+TOKEN_REQUESTS = REGISTRY.counter(
+    "paddleocr_token_requests_total",
+    "Token 池中各 Token 分配到的请求次数（Token 已脱敏）",
+    ["token"],
+)
+TOKEN_BENCHED = REGISTRY.counter(
+    "paddleocr_token_benched_total",
+    "Token 因配额或认证错误被停用的次数",
+    ["reason"],
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "paddleocr_hedged_requests_total",
+    "对冲请求次数",
+)
+HEDGE_WINS = REGISTRY.counter(
+    "paddleocr_hedge_wins_total",
+    "发出对冲请求后先完成的一方（primary / hedge）",
+    ["winner"],
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "paddleocr_circuit_state",
+    "熔断器状态（0=关闭，1=半开，2=打开）",
+)
+CIRCUIT_REJECTED = REGISTRY.counter(
+    "paddleocr_circuit_rejected_total",
+    "熔断器打开期间未发送即失败的请求数",
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "paddleocr_stage_duration_seconds",
+    "各处理阶段的耗时（见 stage_timer）",
+    ["stage"],
+)
+
+
+def render_metrics(registry: MetricsRegistry = REGISTRY) -> str:
+    """以 Prometheus 文本格式导出指标"""
+    return registry.render()
+
+
+def write_textfile(path: str, registry: MetricsRegistry = REGISTRY):
+    """
+    将指标写入 node-exporter textfile collector 使用的 .prom 文件
+    先写临时文件再替换，避免被读取到写了一半的内容
+
+    Args:
+        path: 输出文件路径（需以 .prom 结尾才会被 node-exporter 读取）
+        registry: 指标注册表
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取请求频繁，不输出访问日志
+        pass
+
+
+_http_servers: Dict[Tuple[str, int], ThreadingHTTPServer] = {}
+_http_servers_lock = threading.Lock()
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    在后台线程启动 /metrics HTTP 端点；同一地址重复调用时复用已启动的服务
+
+    Args:
+        port: 监听端口（0 表示随机端口）
+        host: 监听地址，默认只监听本机
+
+    Returns:
+        HTTP 服务实例（server_address 为实际监听地址）
+    """
+    with _http_servers_lock:
+        server = _http_servers.get((host, port))
+        if server is not None:
+            return server
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name="paddleocr-metrics", daemon=True)
+        thread.start()
+        _http_servers[(host, port)] = server
+        print(f"指标端点已启动: http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+def setup_metrics(metrics_config: Dict[str, Any]) -> Optional[str]:
+    """
+    按配置启动 HTTP 端点，并返回 textfile 路径
+
+    Args:
+        metrics_config: 指标配置（port, host, textfile）
+
+    Returns:
+        textfile 输出路径，未配置时返回 None
+    """
+    port = metrics_config.get("port")
+    if port is not None:
+        start_http_server(int(port), metrics_config.get("host") or "127.0.0.1")
+    return metrics_config.get("textfile") or None
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 本地模拟服务
+模拟 AI Studio 版面解析接口（请求格式：file / fileType / 驼峰参数），
+返回带 Markdown 文本和图片 URL 的 layoutParsingResults，
+可配置延迟分布、错误率、429/503 注入与响应大小，用于离线压测与故障演练
+
+用法:
+  python mock_server.py --port 8080 --latency lognormal:0.0,0.5 --rate-429 0.05
+  然后在 .env 中设置 PADDLEOCR_API_URL=http://127.0.0.1:8080/layout-parsing
+"""
+import argparse
+import base64
+import binascii
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Callable, Optional
+
+# PDF 页对象（排除页树节点 /Pages）
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    解析延迟分布描述
+
+    支持:
+        fixed:0.5              固定 0.5 秒
+        uniform:0.2,1.0        0.2~1.0 秒均匀分布
+        normal:1.0,0.2         均值 1.0、标准差 0.2 的正态分布（截断到 0）
+        lognormal:0.0,0.5      对数正态分布（参数为 ln 空间的 mu, sigma），长尾
+        exponential:0.8        均值 0.8 秒的指数分布
+
+    Args:
+        spec: 分布描述
+
+    Returns:
+        采样函数，输入随机数生成器，返回秒数
+    """
+    name, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] if params else []
+    name = name.strip().lower()
+
+    if name == "fixed":
+        return lambda rng: values[0]
+    if name == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    if name == "exponential":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"不支持的延迟分布: {spec}（可选 fixed/uniform/normal/lognormal/exponential）")
+
+
+def make_png(approx_bytes: int, rng: random.Random) -> bytes:
+    """
+    生成一张约 approx_bytes 大小的合法 PNG（随机像素，几乎不可压缩）
+
+    Args:
+        approx_bytes: 目标大小
+        rng: 随机数生成器
+
+    Returns:
+        PNG 内容
+    """
+    side = max(1, int(math.sqrt(max(approx_bytes, 3) / 3)))
+    rows = b"".join(b"\x00" + rng.randbytes(side * 3) for _ in range(side))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+class MockStats:
+    """请求统计（线程安全），通过 GET /stats 查询"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[str, int] = {}
+
+    def add(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name: str, value: int):
+        """记录最大值"""
+        with self._lock:
+            self.counters[name] = max(self.counters.get(name, 0), value)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+
+class MockLayoutParsingServer:
+    """
+    模拟版面解析服务，可在进程内启动（压测脚本）或通过命令行独立运行
+
+    用法:
+        server = MockLayoutParsingServer(latency="fixed:0.2", rate_429=0.1)
+        server.start()
+        ... 使用 server.url 作为 PADDLEOCR_API_URL ...
+        server.stop()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0.2",
+        page_latency: float = 0.0,
+        image_latency: str = "fixed:0.0",
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        rate_503: float = 0.0,
+        api_error_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        max_inflight: Optional[int] = None,
+        pages: Optional[int] = None,
+        markdown_bytes: int = 2000,
+        images_per_page: int = 2,
+        image_bytes: int = 20000,
+        token: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+            latency: 每个请求的基础延迟分布（见 parse_latency）
+            page_latency: 每页额外延迟（秒）
+            image_latency: 图片下载延迟分布
+            error_rate: 返回 HTTP 500 的概率
+            rate_429: 返回 HTTP 429（限流）的概率
+            rate_503: 返回 HTTP 503（服务不可用）的概率
+            api_error_rate: 返回 HTTP 200 但带 error_code 的概率
+            retry_after: 429/503 响应的 Retry-After 秒数，为空时不返回该头
+            max_inflight: 服务端容量，同时处理的请求超过该数时立即返回 429，为空时不限制
+            pages: 固定返回的页数，为空时 PDF 按实际页数、图片为 1 页
+            markdown_bytes: 每页 Markdown 文本的大致字节数
+            images_per_page: 每页图片数
+            image_bytes: 每张图片的大致字节数
+            token: 要求的 Token，为空时不校验
+            seed: 随机种子，便于复现
+        """
+        self.host = host
+        self.port = port
+        self.sample_latency = parse_latency(latency)
+        self.page_latency = page_latency
+        self.sample_image_latency = parse_latency(image_latency)
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.api_error_rate = api_error_rate
+        self.retry_after = retry_after
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.inflight_lock = threading.Lock()
+        self.pages = pages
+        self.markdown_bytes = markdown_bytes
+        self.images_per_page = images_per_page
+        self.image_bytes = image_bytes
+        self.token = token
+        self.stats = MockStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.image_data = make_png(image_bytes, random.Random(seed))
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """版面解析接口地址"""
+        return f"http://{self.host}:{self.port}/layout-parsing"
+
+    def roll(self) -> float:
+        """抽取 [0, 1) 随机数，用于故障注入"""
+        with self._rng_lock:
+            return self._rng.random()
+
+    def sample(self, sampler: Callable[[random.Random], float]) -> float:
+        """按分布采样一次延迟"""
+        with self._rng_lock:
+            return sampler(self._rng)
+
+    def start(self):
+        """在后台线程中启动服务"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """在当前线程中运行服务（命令行模式）"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """停止服务"""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def count_pages(self, file_bytes: bytes, file_type: int) -> int:
+        """估算文档页数"""
+        if self.pages:
+            return self.pages
+        if file_type == 0:
+            return max(1, len(PDF_PAGE_PATTERN.findall(file_bytes)))
+        return 1
+
+    def build_result(self, num_pages: int, file_type: int, options: Dict[str, Any]) -> Dict[str, Any]:
+        """构建 AI Studio 格式的成功响应"""
+        image_base = f"http://{self.host}:{self.port}/images"
+        filler = "模拟识别文本 PaddleOCR-VL mock output. "
+        layout_results = []
+        for page in range(num_pages):
+            images = {
+                f"imgs/img_in_image_box_p{page}_{n}.png": f"{image_base}/{uuid.uuid4().hex}.png"
+                for n in range(self.images_per_page)
+            }
+            image_refs = "\n".join(f"![]({name})" for name in images)
+            body = (filler * (self.markdown_bytes // len(filler.encode("utf-8")) + 1))
+            text = f"# 第 {page + 1} 页\n\n{body[:self.markdown_bytes]}\n\n{image_refs}\n"
+            layout_results.append({
+                "prunedResult": {
+                    "page_index": page,
+                    "model_settings": options,
+                    "parsing_res_list": [],
+                },
+                "markdown": {"text": text, "images": images},
+                "outputImages": None,
+                "inputImage": None,
+            })
+        return {
+            "logId": uuid.uuid4().hex,
+            "errorCode": 0,
+            "errorMsg": "Success",
+            "result": {
+                "layoutParsingResults": layout_results,
+                "dataInfo": {
+                    "type": "pdf" if file_type == 0 else "image",
+                    "numPages": num_pages,
+                    "pages": [{"width": 1240, "height": 1754} for _ in range(num_pages)],
+                },
+            },
+        }
+
+
+def _read_body(handler: BaseHTTPRequestHandler) -> bytes:
+    """读取请求体，支持 Content-Length 与分块传输"""
+    length = handler.headers.get("Content-Length")
+    if length is not None:
+        return handler.rfile.read(int(length))
+
+    data = bytearray()
+    if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+        while True:
+            size = int(handler.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                handler.rfile.readline()
+                break
+            data += handler.rfile.read(size)
+            handler.rfile.readline()
+    return bytes(data)
+
+
+def _make_handler(server: MockLayoutParsingServer):
+    """创建绑定到指定模拟服务的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, payload: Dict[str, Any], extra_headers=None):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (extra_headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+            server.stats.add("api_bytes_out", len(data))
+            server.stats.add(f"api_status_{status}")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                data = json.dumps(server.stats.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            if not self.path.startswith("/images/"):
+                self.send_error(404)
+                return
+
+            time.sleep(server.sample(server.sample_image_latency))
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(server.image_data)))
+            self.end_headers()
+            self.wfile.write(server.image_data)
+            server.stats.add("image_requests")
+            server.stats.add("image_bytes_out", len(server.image_data))
+
+        def do_POST(self):
+            body = _read_body(self)
+            server.stats.add("api_requests")
+            server.stats.add("api_bytes_in", len(body))
+
+            if server.token and self.headers.get("Authorization") != f"token {server.token}":
+                self.send_json(401, {"errorCode": 401, "errorMsg": "Unauthorized"})
+                return
+
+            try:
+                payload = json.loads(body)
+                file_bytes = base64.b64decode(payload["file"], validate=True)
+                file_type = int(payload.get("fileType", 1))
+                if file_type not in (0, 1):
+                    raise ValueError(f"fileType 无效: {file_type}")
+            except (ValueError, KeyError, TypeError, binascii.Error) as e:
+                self.send_json(400, {"errorCode": 400, "errorMsg": f"Bad request: {e}"})
+                return
+
+            retry_headers = {}
+            if server.retry_after is not None:
+                retry_headers["Retry-After"] = str(server.retry_after)
+
+            # 超出服务端容量时立即限流
+            with server.inflight_lock:
+                overloaded = server.max_inflight is not None and server.inflight >= server.max_inflight
+                if not overloaded:
+                    server.inflight += 1
+                    server.stats.peak("api_peak_inflight", server.inflight)
+            if overloaded:
+                server.stats.add("api_overloaded")
+                self.send_json(429, {"errorCode": 429, "errorMsg": "Too Many Requests"}, retry_headers)
+                return
+            try:
+                self.handle_layout_parsing(payload, file_bytes, file_type, retry_headers)
+            finally:
+                with server.inflight_lock:
+                    server.inflight -= 1
+
+        def handle_layout_parsing(self, payload, file_bytes, file_type, retry_headers):
+            num_pages = server.count_pages(file_bytes, file_type)
+            time.sleep(server.sample(server.sample_latency) + server.page_latency * num_pages)
+
+            # 故障注入（按概率依次判定）
+            roll = server.roll()
+            if roll < server.rate_429:
+                self.send_json(429, {"errorCode": 429, "errorMsg": "Too Many Requests"}, retry_headers)
+                return
+            roll -= server.rate_429
+            if roll < server.rate_503:
+                self.send_json(503, {"errorCode": 503, "errorMsg": "Service Unavailable"}, retry_headers)
+                return
+            roll -= server.rate_503
+            if roll < server.error_rate:
+                self.send_json(500, {"errorCode": 500, "errorMsg": "Internal Server Error"})
+                return
+            roll -= server.error_rate
+            if roll < server.api_error_rate:
+                self.send_json(200, {"error_code": 18, "error_msg": "Open api qps request limit reached"})
+                return
+
+            options = {k: v for k, v in payload.items() if k not in ("file", "fileType")}
+            server.stats.add("api_pages", num_pages)
+            self.send_json(200, server.build_result(num_pages, file_type, options))
+
+    return Handler
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="PaddleOCR-VL 本地模拟服务（离线压测用）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+延迟分布:
+  fixed:0.5  uniform:0.2,1.0  normal:1.0,0.2  lognormal:0.0,0.5  exponential:0.8
+
+示例:
+  # 长尾延迟 + 5% 限流 + 2% 服务不可用
+  python mock_server.py --port 8080 --latency lognormal:0.0,0.6 --rate-429 0.05 --rate-503 0.02
+
+  # 图片密集的大文档
+  python mock_server.py --pages 50 --images-per-page 30 --image-bytes 200000
+        """
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认: 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8080, help="监听端口（默认: 8080）")
+    parser.add_argument("--latency", default="fixed:0.2", help="请求延迟分布（默认: fixed:0.2）")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="每页额外延迟（秒）")
+    parser.add_argument("--image-latency", default="fixed:0.0", help="图片下载延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 概率")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="HTTP 429 概率")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="HTTP 503 概率")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="返回 error_code 的概率")
+    parser.add_argument("--retry-after", type=float, help="429/503 响应的 Retry-After 秒数")
+    parser.add_argument("--max-inflight", type=int, help="服务端容量：超过该在途请求数时返回 429")
+    parser.add_argument("--pages", type=int, help="固定返回的页数（默认: PDF 按实际页数，图片 1 页）")
+    parser.add_argument("--markdown-bytes", type=int, default=2000, help="每页 Markdown 字节数")
+    parser.add_argument("--images-per-page", type=int, default=2, help="每页图片数")
+    parser.add_argument("--image-bytes", type=int, default=20000, help="每张图片字节数")
+    parser.add_argument("--token", help="要求的 Token（默认: 不校验）")
+    parser.add_argument("--seed", type=int, help="随机种子")
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    server = MockLayoutParsingServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        page_latency=args.page_latency,
+        image_latency=args.image_latency,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        rate_503=args.rate_503,
+        api_error_rate=args.api_error_rate,
+        retry_after=args.retry_after,
+        max_inflight=args.max_inflight,
+        pages=args.pages,
+        markdown_bytes=args.markdown_bytes,
+        images_per_page=args.images_per_page,
+        image_bytes=args.image_bytes,
+        token=args.token,
+        seed=args.seed,
+    )
+    print(f"模拟服务已启动: {server.url}")
+    print(f"请求统计: http://{args.host}:{args.port}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n模拟服务已停止")
+
+
+if __name__ == "__main__":
+    main()
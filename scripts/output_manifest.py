@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 输出清单
+记录输出目录中每个结果对应的源文件内容摘要、OCR 参数摘要与输出文件列表，
+增量模式下据此跳过输出已是最新的文件
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+from fingerprint import file_sha256
+
+# 清单文件名（位于输出目录下）
+MANIFEST_NAME = ".paddleocr_manifest.jsonl"
+
+
+class OutputManifest:
+    """
+    输出清单（只追加的 JSON Lines，同一源文件以最后一条记录为准）
+    文件大小与修改时间未变时直接复用记录中的内容摘要，避免每次重新计算
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        Args:
+            output_dir: 输出目录
+        """
+        self.output_dir = Path(output_dir)
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._line_count = 0
+        self._load()
+
+    def _load(self):
+        """读取已有清单"""
+        if not self.manifest_path.exists():
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._entries[entry["source"]] = entry
+                    self._line_count += 1
+                except (ValueError, KeyError):
+                    continue
+
+    def _digest(self, source: str) -> Tuple[int, int, str]:
+        """获取源文件的 (大小, 修改时间, 内容摘要)，大小与修改时间未变时复用已有摘要"""
+        stat = os.stat(source)
+        entry = self._entries.get(source)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return stat.st_size, stat.st_mtime_ns, entry["sha256"]
+        return stat.st_size, stat.st_mtime_ns, file_sha256(source)
+
+    def is_current(self, file_path: str, options_digest: str) -> bool:
+        """
+        文件的输出是否已是最新：内容与参数均未变化，且记录的输出文件都存在
+
+        Args:
+            file_path: 源文件路径
+            options_digest: OCR 参数摘要
+
+        Returns:
+            是否可以跳过
+        """
+        source = str(Path(file_path).resolve())
+        entry = self._entries.get(source)
+        if not entry or entry["options"] != options_digest:
+            return False
+        try:
+            _, _, sha256 = self._digest(source)
+        except OSError:
+            return False
+        if sha256 != entry["sha256"]:
+            return False
+        return all((self.output_dir / name).exists() for name in entry["outputs"])
+
+    def update(self, file_path: str, options_digest: str, outputs: List[str]):
+        """
+        记录文件的最新输出
+
+        Args:
+            file_path: 源文件路径
+            options_digest: OCR 参数摘要
+            outputs: 输出文件名列表（相对于输出目录）
+        """
+        source = str(Path(file_path).resolve())
+        size, mtime, sha256 = self._digest(source)
+        entry = {
+            "source": source,
+            "size": size,
+            "mtime": mtime,
+            "sha256": sha256,
+            "options": options_digest,
+            "outputs": outputs,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._entries[source] = entry
+            self._line_count += 1
+
+    def compact(self):
+        """重写清单，去掉被覆盖的旧记录"""
+        with self._lock:
+            if self._line_count <= len(self._entries):
+                return
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.manifest_path)
+            self._line_count = len(self._entries)
+
+
+def expected_outputs(result: Dict[str, Any], base_name: str, output_format: str) -> List[str]:
+    """
+    计算一次识别结果会写出的文件（不含下载的图片）
+
+    Args:
+        result: API 响应结果
+        base_name: 文件基础名
+        output_format: 输出格式 markdown | json | both
+
+    Returns:
+        输出文件名列表（相对于输出目录）
+    """
+    outputs = []
+    if output_format in ["markdown", "both"]:
+        layout_results = result.get("result", {}).get("layoutParsingResults")
+        if layout_results is not None:
+            outputs.extend(f"{base_name}_{i}.md" for i in range(len(layout_results)))
+        elif result.get("result", {}).get("markdown"):
+            outputs.append(f"{base_name}.md")
+    if output_format in ["json", "both"]:
+        outputs.append(f"{base_name}.json")
+    return outputs
@@ -4,42 +4,214 @@ PaddleOCR-VL 文档识别脚本
 支持 PDF/PNG/JPG/BMP/TIF 等格式的 OCR 识别
 """
 import argparse
-import base64
 import json
 import os
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import time
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from config_loader import (
     load_config,
-    load_mode_config,
+    build_mode_config,
     get_api_config,
+    get_batch_config,
+    get_cache_config,
+    get_pdf_split_config,
+    get_metrics_config,
+    get_rate_limit_config,
+    get_circuit_breaker_config,
+    get_hedging_config,
+    get_token_pool_config,
+    get_preprocess_config,
+    get_tiff_split_config,
+    get_retry_config,
     get_output_config,
     get_mode_output_format,
     get_token_from_config,
     DEFAULT_ENV_PATH,
 )
+from adaptive_concurrency import AdaptiveLimiter, RequestSlot, REASON_API_ERROR
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from hedging import Hedger
+from endpoint_pool import EndpointPool
+from token_pool import TokenPool
+from singleflight import INFLIGHT
+from image_preprocess import preprocess_enabled, preprocess_image
+from tiff_split import count_tiff_pages, split_tiff
+from batch_journal import BatchJournal, DEFAULT_JOURNAL_NAME, STATUS_DONE, STATUS_FAILED
+from fingerprint import document_key, options_hash, processing_options
+from output_manifest import OutputManifest, expected_outputs
+from pdf_split import count_pdf_pages, split_pdf, merge_results
+from request_body import StreamingPayload, get_file_type
+from metrics import (
+    API_BYTES_RECEIVED,
+    API_BYTES_SENT,
+    API_ERROR_CODES,
+    API_HTTP_ERRORS,
+    API_REQUEST_SECONDS,
+    API_REQUESTS,
+    API_RETRIES,
+    API_TIMEOUTS,
+    DOCUMENTS,
+    IMAGE_BYTES,
+    IMAGES_DOWNLOADED,
+    setup_metrics,
+    write_textfile,
+)
+from rate_limiter import TokenBucket
+from retry_policy import OCRAPIError, RetryPolicy
+from result_cache import ResultCache
+from stage_timer import (
+    StageTimings,
+    format_stages,
+    timed,
+    STAGE_CACHE,
+    STAGE_DOWNLOAD,
+    STAGE_IMAGE_DOWNLOAD,
+    STAGE_INFERENCE,
+    STAGE_JSON_WRITE,
+    STAGE_MARKDOWN_WRITE,
+    STAGE_PARSE,
+    STAGE_RATE_LIMIT,
+    STAGE_READ_ENCODE,
+    STAGE_SPLIT,
+    STAGE_PREPROCESS,
+    STAGE_UPLOAD,
+)
 
 # 支持的图片格式
 IMAGE_FORMATS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
 # 支持的文档格式
 DOCUMENT_FORMATS = {".pdf"}
+# 默认连接池大小（与 requests 默认值一致）
+DEFAULT_POOL_SIZE = 10
+# 单个文档的默认图片并发下载数
+DEFAULT_IMAGE_WORKERS = 8
+
+# 模块级共享会话：按用途区分 API 调用（"api"）与图片下载（"image"）
+_shared_sessions: Dict[str, requests.Session] = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def mount_connection_pool(session: requests.Session, pool_size: int):
+    """
+    为会话挂载指定大小的 keep-alive 连接池
+
+    Args:
+        session: HTTP 会话
+        pool_size: 每个主机的最大连接数
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.pool_size = pool_size
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    创建带连接池的 HTTP 会话，同一主机的请求复用 TCP/TLS 连接
+
+    Args:
+        pool_size: 每个主机的最大连接数，应不小于并发数
+
+    Returns:
+        HTTP 会话
+    """
+    session = requests.Session()
+    session.headers["Connection"] = "keep-alive"
+    mount_connection_pool(session, pool_size)
+    return session
+
+
+def ensure_pool_size(session: requests.Session, pool_size: int):
+    """
+    连接池小于所需大小时扩容（并发数增大后避免连接被反复丢弃重建）
+
+    Args:
+        session: 由 create_session 创建的 HTTP 会话
+        pool_size: 所需的最小连接数
+    """
+    if getattr(session, "pool_size", 0) < pool_size:
+        mount_connection_pool(session, pool_size)
+
+
+def get_shared_session(name: str = "api", pool_size: Optional[int] = None) -> requests.Session:
+    """
+    获取进程内共享的 keep-alive 会话，未指定会话的调用都会复用它
+
+    Args:
+        name: 会话用途，"api" 用于 OCR 请求，"image" 用于图片下载
+        pool_size: 所需的最小连接数，连接池不足时自动扩容
+
+    Returns:
+        HTTP 会话
+    """
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(name)
+        if session is None:
+            session = create_session(max(pool_size or 0, DEFAULT_POOL_SIZE))
+            _shared_sessions[name] = session
+        elif pool_size:
+            ensure_pool_size(session, pool_size)
+        return session
 
 
-def encode_image_to_base64(image_path: str) -> str:
-    """将图片文件编码为 base64"""
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+def get_base_url(api_config: Dict[str, Any]) -> str:
+    """
+    获取 API 地址，未配置时抛出带获取指引的错误
+
+    Args:
+        api_config: API 配置
+
+    Returns:
+        API 地址
+    """
+    base_url = api_config.get("base_url")
+    if not base_url:
+        raise ValueError(
+            "API URL 未设置，请在 scripts/.env 文件中配置 PADDLEOCR_API_URL\n"
+            "获取地址：https://aistudio.baidu.com/paddleocr/task"
+        )
+    return base_url
 
 
-def encode_pdf_to_base64(pdf_path: str) -> str:
-    """将 PDF 文件编码为 base64"""
-    with open(pdf_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+def build_headers(token: str) -> Dict[str, str]:
+    """构建请求头"""
+    return {
+        "Authorization": f"token {token}",
+        "Content-Type": "application/json"
+    }
+
+
+def record_request_stages(
+    timings: StageTimings,
+    body: StreamingPayload,
+    response: requests.Response,
+    start: float,
+    end: float,
+):
+    """
+    将一次 API 请求拆分为编码、上传、服务端处理与接收响应四个阶段记录
+
+    Args:
+        timings: 分阶段统计
+        body: 本次请求的请求体
+        response: 响应（response.elapsed 为发出请求到收到响应头的耗时）
+        start: 发起请求的时刻
+        end: 响应体接收完毕的时刻
+    """
+    headers_at = min(start + response.elapsed.total_seconds(), end)
+    sent_at = min(body.finished_at or headers_at, headers_at)
+    timings.add(STAGE_READ_ENCODE, body.encode_seconds, body.source_size)
+    timings.add(STAGE_UPLOAD, sent_at - start - body.encode_seconds, len(body))
+    timings.add(STAGE_INFERENCE, headers_at - sent_at)
+    timings.add(STAGE_DOWNLOAD, end - headers_at, len(response.content))
 
 
 def call_ocr_api(
@@ -47,6 +219,17 @@ def call_ocr_api(
     token: str,
     api_config: Dict[str, Any],
     ocr_config: Optional[Dict[str, Any]] = None,
+    session: Optional[requests.Session] = None,
+    data: Optional[bytes] = None,
+    timings: Optional[StageTimings] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    rate_limiter: Optional[TokenBucket] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    hedger: Optional[Hedger] = None,
+    endpoints: Optional[EndpointPool] = None,
+    token_pool: Optional[TokenPool] = None,
+    file_type: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     调用 PaddleOCR-VL API 进行文档识别
@@ -57,140 +240,314 @@ def call_ocr_api(
         token: API Token
         api_config: API 配置（base_url, timeout, max_retries）
         ocr_config: OCR 参数配置
+        session: HTTP 会话（复用连接），为空时使用共享的 API 会话
+        data: 内存中的文件内容（如 PDF 分段），为空时读取 file_path；
+              file_path 仍用于判断文件类型和输出日志
+        timings: 分阶段统计，为空时不计时
+        limiter: 自适应并发限制器，为空时不限制在途请求数
+        rate_limiter: 请求限速器，为空时不限速
+        retry_policy: 重试策略，为空时按 api_config 创建默认策略
+        breaker: 熔断器，为空时不熔断
+        hedger: 对冲请求控制器，为空时不对冲
+        endpoints: 部署地址池，每次尝试选择一个地址并使用其 Token 与限速器；
+                   为空时使用 api_config 中的 base_url 与 token
+        token_pool: Token 池，未使用部署地址池时每次尝试分配剩余额度最多的 Token
+                    及其限速器；为空时使用 token
+        file_type: data 的文件类型（0: PDF，1: 图片），为空时按 file_path 的扩展名判断
 
     Returns:
         API 响应结果
+
+    Raises:
+        OCRAPIError: 请求失败且不可重试，或重试次数（预算）已用完
+        CircuitOpenError: 熔断器打开，请求未发送
     """
-    base_url = api_config.get("base_url")
-    if not base_url:
-        raise ValueError(
-            "API URL 未设置，请在 scripts/.env 文件中配置 PADDLEOCR_API_URL\n"
-            "获取地址：https://aistudio.baidu.com/paddleocr/task"
+    def send(own_timings: Optional[StageTimings]) -> Dict[str, Any]:
+        return _call_ocr_api(
+            file_path, token, api_config, ocr_config, session, data, own_timings,
+            limiter, rate_limiter, retry_policy, breaker, hedger, endpoints, token_pool, file_type,
         )
-    timeout = api_config.get("timeout", 300)
-    max_retries = api_config.get("max_retries", 3)
-
-    file_ext = Path(file_path).suffix.lower()
 
-    # 编码文件
-    if file_ext == ".pdf":
-        file_data = encode_pdf_to_base64(file_path)
-        file_type = 0  # PDF
-    else:
-        file_data = encode_image_to_base64(file_path)
-        file_type = 1  # 图片
+    if hedger is not None:
+        # 主请求与对冲请求各自完整执行（含重试），先成功者生效
+        return hedger.call(send, file_path, timings)
+    return send(timings)
 
-    # 构建请求体（AI Studio 格式）
-    payload = {
-        "file": file_data,
-        "fileType": file_type,
-    }
 
-    # 添加 OCR 配置参数（过滤值为 None 的参数）
-    if ocr_config:
-        for key, value in ocr_config.items():
-            if value is not None:
-                payload[key] = value
+def _call_ocr_api(
+    file_path: str,
+    token: str,
+    api_config: Dict[str, Any],
+    ocr_config: Optional[Dict[str, Any]],
+    session: Optional[requests.Session],
+    data: Optional[bytes],
+    timings: Optional[StageTimings],
+    limiter: Optional[AdaptiveLimiter],
+    rate_limiter: Optional[TokenBucket],
+    retry_policy: Optional[RetryPolicy],
+    breaker: Optional[CircuitBreaker],
+    hedger: Optional[Hedger],
+    endpoints: Optional[EndpointPool],
+    token_pool: Optional[TokenPool],
+    file_type: Optional[int],
+) -> Dict[str, Any]:
+    """
+    发送一路请求（含重试），参数同 call_ocr_api；
+    hedger 不为空时上报每次成功尝试的耗时，重试退避不计入对冲延迟样本
+    """
+    base_url = get_base_url(api_config) if endpoints is None else None
+    timeout = api_config.get("timeout", 300)
+    policy = retry_policy if retry_policy is not None else RetryPolicy.from_config(api_config)
+    max_retries = policy.max_attempts
 
-    # 构建请求头
-    headers = {
-        "Authorization": f"token {token}",
-        "Content-Type": "application/json"
-    }
+    headers = build_headers(token) if endpoints is None else None
+    http = session if session is not None else get_shared_session("api")
 
-    # 发送请求，支持重试
+    # 发送请求，可重试的错误按策略退避后重试
+    policy.on_request()
+    delay = None
     for attempt in range(max_retries):
+        endpoint = None
+        pooled = None
         try:
+            # 熔断器打开时挂起等待或快速失败
+            if breaker is not None:
+                breaker.before_request()
             print(f"正在识别: {file_path} (尝试 {attempt + 1}/{max_retries})")
-            response = requests.post(base_url, json=payload, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            result = response.json()
-
-            if "error_code" in result:
-                raise Exception(f"API 错误: {result.get('error_msg', '未知错误')}")
-
-            return result
-
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"请求超时，{wait_time} 秒后重试...")
-                time.sleep(wait_time)
-            else:
-                raise Exception(f"请求超时: {file_path}")
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"请求失败: {e}，{wait_time} 秒后重试...")
-                time.sleep(wait_time)
+            # 请求体流式编码，文件内容不整体读入内存（每次尝试重新创建）
+            if data is None:
+                body = StreamingPayload.from_path(file_path, ocr_config)
             else:
-                raise Exception(f"请求失败: {e}")
-        except Exception as e:
-            raise Exception(f"识别失败: {e}")
-
+                body = StreamingPayload.from_bytes(
+                    data, get_file_type(file_path) if file_type is None else file_type, ocr_config,
+                )
+            url, request_headers, bucket = base_url, headers, rate_limiter
+            if endpoints is not None:
+                # 多地址负载均衡：重试时重新选择，通常会换到其他地址
+                endpoint = endpoints.acquire()
+                url, request_headers, bucket = endpoint.url, build_headers(endpoint.token), endpoint.rate_limiter
+            elif token_pool is not None:
+                pooled = token_pool.acquire()
+                request_headers, bucket = build_headers(pooled.token), pooled.rate_limiter
+            # 客户端限速：每次发送（含重试）前获取令牌
+            if bucket is not None:
+                waited = bucket.acquire()
+                if timings is not None:
+                    timings.add(STAGE_RATE_LIMIT, waited)
+            # 自适应并发：每次尝试占用一个名额，超时与 429/503 在退出时上报
+            with RequestSlot(limiter) as slot:
+                start = time.perf_counter()
+                response = http.post(url, data=body, headers=request_headers, timeout=timeout)
+                end = time.perf_counter()
+                API_REQUEST_SECONDS.observe(end - start)
+                API_BYTES_SENT.inc(len(body))
+                API_BYTES_RECEIVED.inc(len(response.content))
+                if timings is not None:
+                    record_request_stages(timings, body, response, start, end)
+                if response.status_code >= 400:
+                    API_HTTP_ERRORS.inc(status=response.status_code)
+                response.raise_for_status()
+                with timed(timings, STAGE_PARSE):
+                    result = response.json()
+
+                if "error_code" in result:
+                    error_code = result["error_code"]
+                    API_REQUESTS.inc(outcome="api_error")
+                    API_ERROR_CODES.inc(error_code=error_code)
+                    slot.congested(REASON_API_ERROR)
+                    raise OCRAPIError(
+                        f"API 错误: {result.get('error_msg', '未知错误')}",
+                        error_code=error_code,
+                        retryable=policy.is_retryable_error_code(error_code),
+                    )
+
+                slot.success(end - start)
+                if hedger is not None:
+                    hedger.observe(end - start)
+                API_REQUESTS.inc(outcome="success")
+                if breaker is not None:
+                    breaker.record()
+                if endpoint is not None:
+                    endpoints.release(endpoint, latency=end - start)
+                if pooled is not None:
+                    token_pool.release(pooled)
+                return result
 
-def save_markdown_result(
+        except Exception as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                API_REQUESTS.inc(outcome="timeout")
+                API_TIMEOUTS.inc()
+            elif isinstance(e, requests.exceptions.RequestException):
+                is_http_error = isinstance(e, requests.exceptions.HTTPError)
+                API_REQUESTS.inc(outcome="http_error" if is_http_error else "request_error")
+
+            error = policy.classify(e, file_path)
+            if breaker is not None and not isinstance(error, CircuitOpenError):
+                breaker.record(error)
+            if endpoint is not None:
+                endpoints.release(endpoint, error=error)
+            if pooled is not None and token_pool.release(pooled, error):
+                # 该 Token 已停用，换用其他 Token 重试
+                error.retryable = True
+            if not policy.should_retry(error, attempt):
+                if error is e:
+                    raise
+                raise error from e
+
+            API_RETRIES.inc()
+            delay = policy.backoff(delay, error)
+            print(f"{error}，{delay:.1f} 秒后重试...")
+            time.sleep(delay)
+
+
+def write_markdown_pages(
     result: Dict[str, Any],
     output_dir: str,
     base_name: str,
-):
+    timings: Optional[StageTimings] = None,
+) -> List[Tuple[str, str]]:
     """
-    保存 Markdown 结果
+    写出 Markdown 文本，并返回待下载的图片列表
     支持 AI Studio 格式：result["layoutParsingResults"]
 
     Args:
         result: API 响应结果
         output_dir: 输出目录
         base_name: 文件基础名
+        timings: 分阶段统计，为空时不计时
+
+    Returns:
+        图片列表 [(相对路径, 图片 URL)]
     """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
+    images = []
 
     # AI Studio 格式
     if "layoutParsingResults" in result.get("result", {}):
         layout_results = result["result"]["layoutParsingResults"]
         for i, res in enumerate(layout_results):
-            # 1. 保存 Markdown 文本
             md_filename = output_path / f"{base_name}_{i}.md"
             markdown_text = res.get("markdown", {}).get("text", "")
-            with open(md_filename, "w", encoding="utf-8") as f:
-                f.write(markdown_text)
+            with timed(timings, STAGE_MARKDOWN_WRITE, len(markdown_text.encode("utf-8"))):
+                with open(md_filename, "w", encoding="utf-8") as f:
+                    f.write(markdown_text)
             print(f"Markdown 结果已保存: {md_filename}")
 
-            # 2. 下载并保存图片
             markdown_images = res.get("markdown", {}).get("images", {})
             if markdown_images:
-                for img_rel_path, img_url in markdown_images.items():
-                    try:
-                        # API 返回的是图片 URL，需要下载
-                        response = requests.get(img_url, timeout=30)
-                        response.raise_for_status()
-                        img_bytes = response.content
-                        # 构建完整路径
-                        img_full_path = output_path / img_rel_path
-                        img_full_path.parent.mkdir(parents=True, exist_ok=True)
-                        # 保存图片
-                        with open(img_full_path, "wb") as img_file:
-                            img_file.write(img_bytes)
-                        print(f"图片已保存: {img_full_path}")
-                    except Exception as e:
-                        print(f"警告: 图片 {img_rel_path} 保存失败: {e}")
-                        continue
+                images.extend(markdown_images.items())
     # 原格式兼容
     else:
         markdown_content = result.get("result", {}).get("markdown", "")
         if not markdown_content:
             print("警告: 未获取到 Markdown 内容")
-            return
+            return images
         output_file = output_path / f"{base_name}.md"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+        with timed(timings, STAGE_MARKDOWN_WRITE, len(markdown_content.encode("utf-8"))):
+            with open(output_file, "w", encoding="utf-8") as f:
+                f.write(markdown_content)
         print(f"Markdown 结果已保存: {output_file}")
 
+    return images
+
+
+def write_image(output_dir: str, img_rel_path: str, img_bytes: bytes):
+    """
+    保存下载的图片到输出目录
+
+    Args:
+        output_dir: 输出目录
+        img_rel_path: 图片相对路径（Markdown 中引用的路径）
+        img_bytes: 图片内容
+    """
+    img_full_path = Path(output_dir) / img_rel_path
+    img_full_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(img_full_path, "wb") as img_file:
+        img_file.write(img_bytes)
+    print(f"图片已保存: {img_full_path}")
+
+
+def download_image(
+    session: requests.Session,
+    output_dir: str,
+    img_rel_path: str,
+    img_url: str,
+    timings: Optional[StageTimings] = None,
+) -> bool:
+    """
+    下载单张图片并保存，失败时仅打印警告
+
+    Args:
+        session: HTTP 会话
+        output_dir: 输出目录
+        img_rel_path: 图片相对路径
+        img_url: 图片 URL
+        timings: 分阶段统计，为空时不计时
+
+    Returns:
+        是否保存成功
+    """
+    start = time.perf_counter()
+    try:
+        # API 返回的是图片 URL，需要下载
+        response = session.get(img_url, timeout=30)
+        response.raise_for_status()
+        write_image(output_dir, img_rel_path, response.content)
+        if timings is not None:
+            timings.add(STAGE_IMAGE_DOWNLOAD, time.perf_counter() - start, len(response.content))
+        IMAGES_DOWNLOADED.inc(outcome="success")
+        IMAGE_BYTES.inc(len(response.content))
+        return True
+    except Exception as e:
+        IMAGES_DOWNLOADED.inc(outcome="failure")
+        print(f"警告: 图片 {img_rel_path} 保存失败: {e}")
+        return False
+
+
+def save_markdown_result(
+    result: Dict[str, Any],
+    output_dir: str,
+    base_name: str,
+    session: Optional[requests.Session] = None,
+    image_workers: int = DEFAULT_IMAGE_WORKERS,
+    timings: Optional[StageTimings] = None,
+):
+    """
+    保存 Markdown 结果
+    支持 AI Studio 格式：result["layoutParsingResults"]
+    整个文档的图片通过有界线程池并发下载
+
+    Args:
+        result: API 响应结果
+        output_dir: 输出目录
+        base_name: 文件基础名
+        session: 下载图片使用的 HTTP 会话，为空时使用共享的图片会话
+        image_workers: 图片并发下载数，1 为逐张下载
+        timings: 分阶段统计，为空时不计时
+    """
+    # 1. 保存 Markdown 文本
+    images = write_markdown_pages(result, output_dir, base_name, timings)
+    if not images:
+        return
+    http = session if session is not None else get_shared_session("image", image_workers)
+
+    # 2. 下载并保存图片
+    image_workers = max(1, min(int(image_workers), len(images)))
+    if image_workers == 1:
+        for img_rel_path, img_url in images:
+            download_image(http, output_dir, img_rel_path, img_url, timings)
+        return
+
+    with ThreadPoolExecutor(max_workers=image_workers) as executor:
+        for img_rel_path, img_url in images:
+            executor.submit(download_image, http, output_dir, img_rel_path, img_url, timings)
+
 
 def save_json_result(
     result: Dict[str, Any],
     json_file: str,
+    timings: Optional[StageTimings] = None,
 ):
     """
     保存 JSON 结果
@@ -198,67 +555,760 @@ def save_json_result(
     Args:
         result: API 响应结果
         json_file: JSON 输出文件路径
+        timings: 分阶段统计，为空时不计时
     """
     output_path = Path(json_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with timed(timings, STAGE_JSON_WRITE):
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
 
     print(f"JSON 结果已保存: {output_path}")
 
 
-def ocr_file(
-    file_path: str,
+def load_ocr_settings(
     mode: str = "标准",
-    output_dir: Optional[str] = None,
     config_path: Optional[Path] = None,
+    env_path: Optional[Path] = None,
 ) -> Dict[str, Any]:
     """
-    对单个文件进行 OCR 识别
-    Token 从配置文件中的 .env 自动读取
+    加载一次识别所需的全部配置（API、输出、预设参数与 Token）
+    配置文件与 .env 只解析一次
 
     Args:
-        file_path: 文件路径
         mode: 预设模式（快速/标准/精细）
-        output_dir: 输出目录
         config_path: 配置文件路径
+        env_path: .env 文件路径
 
     Returns:
-        API 响应结果
+        配置字典，包含 api_config, output_config, batch_config, cache_config,
+        pdf_split_config, metrics_config, rate_limit_config, retry_config,
+        circuit_breaker_config, hedging_config, token_pool_config, preprocess_config,
+        tiff_split_config, ocr_config, token
     """
     # 加载配置（自动合并 .env 文件）
-    config = load_config(config_path)
-    api_config = get_api_config(config)
-    output_config = get_output_config(config)
-    ocr_config = load_mode_config(mode, config_path)
+    config = load_config(config_path, env_path)
+    ocr_config = build_mode_config(config, mode)
 
     # 从配置中获取 Token
     token = get_token_from_config(config)
+    if not token:
+        # 配置了多个部署地址且各自指定了 Token 时，可以不设置 PADDLEOCR_TOKEN
+        endpoint_tokens = [
+            entry.get("token") if isinstance(entry, dict) else None
+            for entry in get_api_config(config).get("endpoints") or []
+        ]
+        if endpoint_tokens and all(endpoint_tokens):
+            token = endpoint_tokens[0]
+        # 配置了 Token 池时同理
+        pool_tokens = get_token_pool_config(config).get("tokens") or []
+        if pool_tokens:
+            token = token or pool_tokens[0]
     if not token:
         raise ValueError(f"Token 未设置，请在 {DEFAULT_ENV_PATH} 文件中配置 PADDLEOCR_TOKEN")
 
-    # 获取模式的输出格式
-    output_format = get_mode_output_format(ocr_config)
+    return {
+        "api_config": get_api_config(config),
+        "output_config": get_output_config(config),
+        "batch_config": get_batch_config(config),
+        "cache_config": get_cache_config(config),
+        "pdf_split_config": get_pdf_split_config(config),
+        "metrics_config": get_metrics_config(config),
+        "rate_limit_config": get_rate_limit_config(config),
+        "retry_config": get_retry_config(config),
+        "circuit_breaker_config": get_circuit_breaker_config(config),
+        "hedging_config": get_hedging_config(config),
+        "token_pool_config": get_token_pool_config(config),
+        "preprocess_config": get_preprocess_config(config),
+        "tiff_split_config": get_tiff_split_config(config),
+        "ocr_config": ocr_config,
+        "token": token,
+    }
+
+
+class PaddleOCRClient:
+    """
+    可复用的 PaddleOCR-VL 客户端
+    创建时一次性解析配置、预设与 Token，并持有 HTTP 会话复用连接，
+    适合在长期运行的进程中反复调用
+
+    用法:
+        with PaddleOCRClient(mode="标准") as client:
+            client.ocr("document.pdf")
+            client.batch(["a.pdf", "b.png"], workers=4)
+    """
+
+    def __init__(
+        self,
+        mode: str = "标准",
+        config_path: Optional[Path] = None,
+        env_path: Optional[Path] = None,
+        session: Optional[requests.Session] = None,
+        image_session: Optional[requests.Session] = None,
+        use_cache: bool = True,
+        pages_per_chunk: Optional[int] = None,
+    ):
+        """
+        Args:
+            mode: 预设模式（快速/标准/精细）
+            config_path: 配置文件路径
+            env_path: .env 文件路径
+            session: API 调用使用的会话，为空时创建客户端独占的连接池
+            image_session: 图片下载使用的会话，为空时创建客户端独占的连接池
+            use_cache: 是否使用结果缓存（还需在配置文件中启用 cache.enabled）
+            pages_per_chunk: PDF 分段页数，默认读取配置文件中的 pdf_split.pages_per_chunk
+        """
+        settings = load_ocr_settings(mode, config_path, env_path)
+        self.mode = mode
+        self.api_config = settings["api_config"]
+        self.output_config = settings["output_config"]
+        self.batch_config = settings["batch_config"]
+        self.ocr_config = settings["ocr_config"]
+        self.token = settings["token"]
+        self.output_format = get_mode_output_format(self.ocr_config)
+        self.image_workers = self.output_config.get("image_workers", DEFAULT_IMAGE_WORKERS)
+        self.cache = ResultCache.from_config(settings["cache_config"]) if use_cache else None
+        self.coalesce = settings["cache_config"].get("coalesce", False)
+        self.preprocess_config = settings["preprocess_config"]
+        # 指标导出：按配置启动 /metrics 端点，textfile 在每个文档处理完成后刷新
+        self.metrics_textfile = setup_metrics(settings["metrics_config"])
+
+        # PDF 分段处理（pages_per_chunk 为空表示整份提交）
+        pdf_split_config = settings["pdf_split_config"]
+        self.pages_per_chunk = pages_per_chunk or pdf_split_config.get("pages_per_chunk")
+        self.chunk_workers = pdf_split_config.get("workers", 4) if self.pages_per_chunk else 1
+
+        # 多页 TIFF 拆分（未启用 tiff_split.enabled 时整份提交）
+        tiff_split_config = settings["tiff_split_config"]
+        self.tiff_split = tiff_split_config.get("enabled", False)
+        self.tiff_workers = tiff_split_config.get("workers", 4) if self.tiff_split else 1
+        self.tiff_bundle_max_bytes = tiff_split_config.get("bundle_max_bytes")
+
+        # 缓存键、断点日志与输出清单的参数摘要：本地预处理与拆分会改变上传内容和识别结果，一并计入
+        self.digest_options = processing_options(
+            self.ocr_config, self.preprocess_config, self.pages_per_chunk, tiff_split_config,
+        )
+        self.options_digest = options_hash(self.digest_options)
+
+        # 重试策略（批量处理时附加批次级重试预算）
+        self.retry_config = settings["retry_config"]
+        self.retry_policy = RetryPolicy.from_config(self.api_config, self.retry_config)
+
+        # 熔断器（未启用 circuit_breaker.enabled 时为空），在客户端的整个生命周期内共享
+        self.breaker = CircuitBreaker.from_config(settings["circuit_breaker_config"])
+
+        # 对冲请求（未启用 hedging.enabled 时为空），延迟样本在客户端的整个生命周期内累积
+        self.hedger = Hedger.from_config(settings["hedging_config"])
+
+        # 多地址负载均衡（未配置 api.endpoints 时为空），各地址按自己的 Token 分别限速
+        self.endpoints = EndpointPool.from_config(
+            self.api_config, self.token, settings["rate_limit_config"],
+        )
+
+        # Token 池（token_pool.tokens 少于 2 个时为空），各 Token 分别限速与记账
+        self.token_pool = TokenPool.from_config(
+            settings["token_pool_config"], settings["rate_limit_config"],
+        )
+
+        # 请求限速（未配置 rate_limit.qps 时为空）
+        self.rate_limiter = TokenBucket.from_config(settings["rate_limit_config"], self.token)
+
+        # 自适应并发限制器（批量处理启用 batch.adaptive 时创建）
+        self.limiter: Optional[AdaptiveLimiter] = None
+
+        # 连接池按并发数自动扩容，配置中的 pool_size 为下限
+        workers = self.batch_config.get("workers", 1)
+        self._owned_sessions = []
+        if session is None:
+            session = create_session()
+            self._owned_sessions.append(session)
+        if image_session is None:
+            image_session = create_session()
+            self._owned_sessions.append(image_session)
+        self.session = session
+        self.image_session = image_session
+        self.resize_pools(workers)
+
+    def resize_pools(self, workers: int):
+        """
+        按并发数调整 API 与图片下载的连接池大小
+
+        Args:
+            workers: 同时处理的文件数
+        """
+        api_pool = max(
+            self.api_config.get("pool_size") or DEFAULT_POOL_SIZE,
+            workers * max(self.chunk_workers, self.tiff_workers),
+        )
+        image_pool = max(
+            self.api_config.get("image_pool_size") or DEFAULT_POOL_SIZE,
+            workers * self.image_workers,
+        )
+        ensure_pool_size(self.session, api_pool)
+        ensure_pool_size(self.image_session, image_pool)
+
+    def close(self):
+        """关闭客户端自行创建的 HTTP 会话"""
+        for session in self._owned_sessions:
+            session.close()
+        self._owned_sessions = []
+
+    def __enter__(self) -> "PaddleOCRClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call_api(
+        self,
+        file_path: str,
+        timings: Optional[StageTimings] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """
+        调用 API 识别文件；启用 PDF 分段时，长 PDF 拆分后并发提交并按页序合并；
+        启用 TIFF 拆分时，多页 TIFF 合成一个 PDF 提交，或逐页并发提交并按页序合并；
+        启用图片预处理时，上传处理后的图片
+
+        Args:
+            file_path: 文件路径
+            timings: 分阶段统计，为空时不计时
+            retry_policy: 重试策略（如带批次预算的副本），为空时使用客户端的策略
+
+        Returns:
+            API 响应结果
+        """
+        file_type = get_file_type(file_path)
+        if file_type == 1 and self.tiff_split and count_tiff_pages(file_path) > 1:
+            return self._call_tiff_pages(file_path, timings, retry_policy)
+        if (
+            not self.pages_per_chunk
+            or file_type != 0
+            or count_pdf_pages(file_path) <= self.pages_per_chunk
+        ):
+            data = None
+            if file_type == 1 and preprocess_enabled(self.preprocess_config):
+                with timed(timings, STAGE_PREPROCESS):
+                    data = preprocess_image(file_path, self.preprocess_config, self.ocr_config)
+            return self._call(file_path, timings, data, retry_policy=retry_policy)
+
+        with timed(timings, STAGE_SPLIT):
+            chunks = split_pdf(file_path, self.pages_per_chunk)
+        print(f"PDF 分段处理: {file_path}（{len(chunks)} 段，每段 {self.pages_per_chunk} 页）")
+        parts = [(f"{start}-{end}", data) for start, end, data in chunks]
+        return self._call_parts(
+            file_path, "分段识别", parts, self.chunk_workers, timings, retry_policy=retry_policy,
+        )
+
+    def _call(
+        self,
+        file_path: str,
+        timings: Optional[StageTimings] = None,
+        data: Optional[bytes] = None,
+        file_type: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """使用客户端的会话、限速、重试、熔断等设置调用一次 API"""
+        if retry_policy is None:
+            retry_policy = self.retry_policy
+        return call_ocr_api(
+            file_path, self.token, self.api_config, self.ocr_config, self.session, data,
+            timings=timings, limiter=self.limiter, rate_limiter=self.rate_limiter,
+            retry_policy=retry_policy, breaker=self.breaker, hedger=self.hedger,
+            endpoints=self.endpoints, token_pool=self.token_pool, file_type=file_type,
+        )
+
+    def _call_tiff_pages(
+        self,
+        file_path: str,
+        timings: Optional[StageTimings] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """
+        拆分多页 TIFF 后识别：合成的 PDF 不超过 bundle_max_bytes 时一次提交，
+        否则逐页作为图片并发提交，按页序合并结果
 
-    # 设置默认输出目录
-    if output_dir is None:
-        output_dir = output_config.get("markdown_dir", "output")
+        Args:
+            file_path: 文件路径
+            timings: 分阶段统计，为空时不计时
 
-    # 调用 API
-    result = call_ocr_api(file_path, token, api_config, ocr_config)
+        Returns:
+            API 响应结果
+        """
+        with timed(timings, STAGE_SPLIT):
+            file_type, payloads, num_pages = split_tiff(
+                file_path, self.preprocess_config, self.ocr_config, self.tiff_bundle_max_bytes,
+            )
+        if file_type == 0:
+            print(f"多页 TIFF 合成 PDF 提交: {file_path}（{num_pages} 页）")
+            return self._call(file_path, timings, payloads[0], file_type, retry_policy)
+
+        print(f"多页 TIFF 逐页提交: {file_path}（{num_pages} 页）")
+        parts = [(str(index), data) for index, data in enumerate(payloads, 1)]
+        return self._call_parts(
+            file_path, "分页识别", parts, self.tiff_workers, timings, file_type, retry_policy,
+        )
 
-    # 保存结果（使用模式配置的输出格式）
-    base_name = Path(file_path).stem
+    def _call_parts(
+        self,
+        file_path: str,
+        label: str,
+        parts: List[Tuple[str, bytes]],
+        workers: int,
+        timings: Optional[StageTimings] = None,
+        file_type: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """
+        并发提交同一文档拆分出的各部分（PDF 分段或 TIFF 页），按页序合并结果
+
+        Args:
+            file_path: 文件路径
+            label: 日志中的操作名称
+            parts: [(页码范围, 请求内容)]，按页序排列
+            workers: 同时在途的请求数上限
+            timings: 分阶段统计，为空时不计时
+            file_type: 请求内容的文件类型，为空时按 file_path 的扩展名判断
+            retry_policy: 重试策略，为空时使用客户端的策略
+
+        Returns:
+            合并后的 API 响应结果
+        """
+        def recognize_part(part):
+            pages, data = part
+            print(f"{label}: {file_path} 第 {pages} 页")
+            return self._call(file_path, timings, data, file_type, retry_policy)
+
+        # executor.map 按提交顺序返回结果，保证合并后的页序与原文档一致
+        with ThreadPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+            results = list(executor.map(recognize_part, parts))
+
+        return merge_results(results)
+
+    def recognize(
+        self,
+        file_path: str,
+        timings: Optional[StageTimings] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """
+        获取文件的识别结果：启用缓存时优先读取缓存，未命中再调用 API；
+        启用 cache.coalesce 时，同一进程内内容与参数相同的并发请求只发送一次
 
-    if output_format in ["markdown", "both"]:
-        save_markdown_result(result, output_dir, base_name)
+        Args:
+            file_path: 文件路径
+            timings: 分阶段统计，为空时不计时
+            retry_policy: 重试策略，为空时使用客户端的策略
 
-    if output_format in ["json", "both"]:
-        json_file = os.path.join(output_dir, f"{base_name}.json")
-        save_json_result(result, json_file)
+        Returns:
+            API 响应结果
+        """
+        if self.cache is None and not self.coalesce:
+            return self.call_api(file_path, timings, retry_policy)
+
+        with timed(timings, STAGE_CACHE):
+            key = document_key(file_path, self.digest_options)
+            result = self.cache.get(key) if self.cache is not None else None
+        if result is not None:
+            print(f"命中缓存: {file_path}")
+            return result
 
-    return result
+        def fetch() -> Dict[str, Any]:
+            fetched = self.call_api(file_path, timings, retry_policy)
+            if self.cache is not None:
+                self.cache.put(key, fetched)
+            return fetched
+
+        if not self.coalesce:
+            return fetch()
+        result, shared = INFLIGHT.do(key, fetch)
+        if shared:
+            print(f"与进行中的相同文件合并请求: {file_path}")
+        # 浅拷贝：共用同一结果的调用方会各自添加 timings 等字段
+        return dict(result)
+
+    def resolve_output_dir(self, output_dir: Optional[str] = None) -> str:
+        """未指定输出目录时使用配置文件中的 markdown_dir"""
+        if output_dir is None:
+            output_dir = self.output_config.get("markdown_dir", "output")
+        return output_dir
+
+    def ocr(
+        self,
+        file_path: str,
+        output_dir: Optional[str] = None,
+        manifest: Optional[OutputManifest] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        """
+        对单个文件进行 OCR 识别并按预设的输出格式保存结果
+
+        Args:
+            file_path: 文件路径
+            output_dir: 输出目录，默认使用配置文件中的 markdown_dir
+            manifest: 输出清单（增量模式），保存结果后记录本次的输出
+            retry_policy: 重试策略（批量处理时为带批次预算的副本），为空时使用客户端的策略
+
+        Returns:
+            API 响应结果，附加 "timings" 字段记录本文件各阶段的耗时、字节数与次数
+            （{阶段: {"seconds", "bytes", "count"}}，见 stage_timer）
+        """
+        output_dir = self.resolve_output_dir(output_dir)
+        timings = StageTimings()
+
+        try:
+            # 调用 API（或读取缓存）
+            result = self.recognize(file_path, timings, retry_policy)
+            self.save(result, file_path, output_dir, manifest, timings)
+            DOCUMENTS.inc(outcome="success")
+        except Exception:
+            DOCUMENTS.inc(outcome="failure")
+            raise
+        finally:
+            self.export_metrics()
+
+        result["timings"] = timings.to_dict()
+        return result
+
+    def save(
+        self,
+        result: Dict[str, Any],
+        file_path: str,
+        output_dir: str,
+        manifest: Optional[OutputManifest] = None,
+        timings: Optional[StageTimings] = None,
+    ):
+        """
+        按预设的输出格式保存识别结果
+
+        Args:
+            result: API 响应结果
+            file_path: 源文件路径
+            output_dir: 输出目录
+            manifest: 输出清单（增量模式），保存后记录本次的输出
+            timings: 分阶段统计，为空时不计时
+        """
+        base_name = Path(file_path).stem
+
+        if self.output_format in ["markdown", "both"]:
+            save_markdown_result(
+                result, output_dir, base_name, self.image_session, self.image_workers, timings
+            )
+
+        if self.output_format in ["json", "both"]:
+            json_file = os.path.join(output_dir, f"{base_name}.json")
+            save_json_result(result, json_file, timings)
+
+        if manifest is not None:
+            outputs = expected_outputs(result, base_name, self.output_format)
+            manifest.update(file_path, self.options_digest, outputs)
+
+    def export_metrics(self):
+        """配置了 metrics.textfile 时刷新指标文件，写入失败只打印警告"""
+        if not self.metrics_textfile:
+            return
+        try:
+            write_textfile(self.metrics_textfile)
+        except OSError as e:
+            print(f"警告: 指标文件写入失败: {e}")
+
+    def open_journal(self, output_dir: Optional[str] = None) -> BatchJournal:
+        """
+        打开批量处理的断点日志，默认位于输出目录下
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            BatchJournal
+        """
+        journal_file = self.batch_config.get("journal_file")
+        if not journal_file:
+            journal_file = Path(self.resolve_output_dir(output_dir)) / DEFAULT_JOURNAL_NAME
+        return BatchJournal(Path(journal_file), self.options_digest)
+
+    def batch(
+        self,
+        files: List[str],
+        output_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        resume: Optional[bool] = None,
+        incremental: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        批量处理多个文件
+
+        workers > 1 时使用线程池并发处理，同时保持 workers 个 API 请求在途，
+        每个文件完成后立即保存结果（按完成顺序而非输入顺序）
+        启用自适应并发时 workers 为初始值，在途请求数随延迟与限流信号自动调整
+        每个文件的结果写入断点日志，中断后重新运行会跳过已完成（且输出仍在）的文件；
+        批次没有失败的文件时删除断点日志
+
+        Args:
+            files: 文件路径列表
+            output_dir: 输出目录
+            workers: 并发数，默认读取配置文件中的 batch.workers
+            resume: 是否跳过断点日志中已完成的文件，默认读取配置文件中的 batch.resume
+            incremental: 是否跳过输出已是最新的文件（对比输出目录中的清单），
+                默认读取配置文件中的 batch.incremental
+            adaptive: 是否启用自适应并发，默认读取配置文件中的 batch.adaptive.enabled
+
+        Returns:
+            批量处理摘要，包含 total, success, resumed（断点续跑跳过的文件数）,
+            skipped（增量模式下输出已是最新而跳过的文件数）, failed（[(文件, 错误)]）,
+            durations（{文件: 耗时秒数}）, stages（{文件: 分阶段统计}）,
+            stage_totals（全部文件的分阶段累计）, retries（重试预算统计）,
+            outages（熔断器记录的服务中断时段 [{"start", "end", "seconds"}]）,
+            hedging（对冲请求统计 {"requests", "hedged", "hedge_wins"}，未启用时为 None）,
+            endpoints（各部署地址的累计统计，未配置多地址时为 None）,
+            tokens（Token 池中各 Token 的用量，未配置 Token 池时为 None）,
+            concurrency（自适应并发统计，未启用时为 None）,
+            elapsed（总耗时秒数）
+        """
+        adaptive_config = self.batch_config.get("adaptive") or {}
+        if adaptive is None:
+            adaptive = adaptive_config.get("enabled", False)
+        if resume is None:
+            resume = self.batch_config.get("resume", True)
+        if incremental is None:
+            incremental = self.batch_config.get("incremental", False)
+        journal = self.open_journal(output_dir)
+        manifest = OutputManifest(self.resolve_output_dir(output_dir)) if incremental else None
+
+        total = len(files)
+        resumed_count = 0
+        skipped_count = 0
+        if resume:
+            pending = [file_path for file_path in files if not journal.is_done(file_path)]
+            resumed_count = len(files) - len(pending)
+            if resumed_count:
+                print(f"断点续跑: 跳过上次运行中已完成的 {resumed_count} 个文件（{journal.journal_path}）")
+            files = pending
+        if manifest is not None:
+            pending = [
+                file_path for file_path in files
+                if not manifest.is_current(file_path, self.options_digest)
+            ]
+            if len(pending) < len(files):
+                print(f"增量模式: 跳过输出已是最新的 {len(files) - len(pending)} 个文件")
+            skipped_count += len(files) - len(pending)
+            files = pending
+
+        if workers is None:
+            workers = self.batch_config.get("workers", 1)
+        workers = max(1, min(int(workers), len(files)))
+        if adaptive:
+            # 限制器在客户端内复用，长期运行的进程保留已探测到的并发上限
+            if self.limiter is None:
+                self.limiter = AdaptiveLimiter.from_config(adaptive_config, workers)
+            print(
+                f"自适应并发: 当前上限 {self.limiter.limit}"
+                f"（范围 {self.limiter.min_limit}-{self.limiter.max_limit}）"
+            )
+            # 线程数取上限的最大值，实际在途请求数由限制器控制
+            workers = max(1, min(self.limiter.max_limit, len(files)))
+        self.resize_pools(workers)
+        # 每个批次使用新的重试预算，限制整体故障时的重试总量；
+        # 预算附加在策略副本上逐次传递，不影响之后的 ocr() 与同时进行的其他批次
+        retry_policy = self.retry_policy.with_new_budget(self.retry_config)
+        retry_budget = retry_policy.budget
+
+        success_count = 0
+        failed_files = []
+        durations = {}
+        file_stages = {}
+        batch_timings = StageTimings()
+        batch_start = time.perf_counter()
+        batch_start_time = time.time()
+        hedging_start = self.hedger.stats() if self.hedger else None
+
+        resolved_dir = self.resolve_output_dir(output_dir)
+
+        def run(file_path):
+            # 断点日志在工作线程中写入（与输出清单一致），批量处理中断时已完成的文件也有记录
+            start = time.perf_counter()
+            try:
+                result = self.ocr(file_path, output_dir, manifest, retry_policy)
+            except Exception as e:
+                journal.record(file_path, STATUS_FAILED, str(e))
+                raise
+            outputs = [
+                os.path.join(resolved_dir, name)
+                for name in expected_outputs(result, Path(file_path).stem, self.output_format)
+            ]
+            journal.record(file_path, STATUS_DONE, outputs=outputs)
+            return time.perf_counter() - start, result["timings"]
+
+        def on_success(file_path, outcome):
+            nonlocal success_count
+            elapsed, stages = outcome
+            success_count += 1
+            durations[file_path] = elapsed
+            file_stages[file_path] = stages
+            batch_timings.merge(stages)
+
+        def on_failure(file_path, error):
+            failed_files.append((file_path, str(error)))
+
+        if workers == 1:
+            for i, file_path in enumerate(files, 1):
+                print(f"\n[{i}/{len(files)}] 处理文件: {file_path}")
+                try:
+                    on_success(file_path, run(file_path))
+                except Exception as e:
+                    print(f"错误: {e}")
+                    on_failure(file_path, e)
+        else:
+            print(f"并发处理 {len(files)} 个文件（workers={workers}）")
+            executor = ThreadPoolExecutor(max_workers=workers)
+            remaining = iter(files)
+            futures = {}
+            completed = 0
+
+            def submit_next():
+                file_path = next(remaining, None)
+                if file_path is not None:
+                    futures[executor.submit(run, file_path)] = file_path
+
+            try:
+                # 排队的任务数有上限：中断时尚未提交的文件不会再发送
+                for _ in range(workers * 2):
+                    submit_next()
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = futures.pop(future)
+                        completed += 1
+                        try:
+                            on_success(file_path, future.result())
+                            print(f"\n[{completed}/{len(files)}] 完成: {file_path}")
+                        except Exception as e:
+                            print(f"\n[{completed}/{len(files)}] 错误: {file_path}: {e}")
+                            on_failure(file_path, e)
+                        submit_next()
+            except BaseException:
+                # Ctrl-C 等：取消排队的任务，不等待在途请求，已完成的文件已写入断点日志
+                executor.shutdown(wait=False, cancel_futures=True)
+                print(f"\n批量处理中断: 已完成 {completed}/{len(files)} 个文件，重新运行会从断点继续")
+                raise
+            executor.shutdown()
+
+        if manifest is not None:
+            manifest.compact()
+        if not failed_files:
+            # 批次已全部完成，断点日志只用于中断后的续跑，之后的运行重新处理全部文件
+            journal.clear()
+
+        # 输出摘要
+        print(f"\n{'='*50}")
+        print(f"处理完成: 成功 {success_count + resumed_count + skipped_count}/{total}")
+        if resumed_count:
+            print(f"其中 {resumed_count} 个文件已在上次中断的运行中完成，本次跳过")
+        if skipped_count:
+            print(f"其中 {skipped_count} 个文件已是最新，本次跳过")
+
+        retries = retry_budget.stats()
+        if retries["retries"] or retries["denied"]:
+            print(f"重试: {retries['retries']} 次，因预算用完放弃 {retries['denied']} 次")
+
+        outages = self.breaker.outages_since(batch_start_time) if self.breaker else []
+        for outage in outages:
+            end = outage["end"] or "仍未恢复"
+            print(f"服务中断: {outage['start']} ~ {end}（{outage['seconds']} 秒）")
+
+        hedging = None
+        if self.hedger is not None:
+            hedging_end = self.hedger.stats()
+            hedging = {
+                "requests": hedging_end["requests"] - hedging_start["requests"],
+                "hedged": hedging_end["hedged"] - hedging_start["hedged"],
+                "hedge_wins": hedging_end["wins"]["hedge"] - hedging_start["wins"]["hedge"],
+            }
+            if hedging["hedged"]:
+                print(f"对冲请求: {hedging['hedged']} 次，其中 {hedging['hedge_wins']} 次先于原请求完成")
+
+        endpoint_stats = self.endpoints.stats() if self.endpoints else None
+        if endpoint_stats:
+            print(f"\n部署地址:")
+            for item in endpoint_stats:
+                latency = f"{item['latency']:.2f}s" if item["latency"] is not None else "-"
+                print(
+                    f"  {item['url']}: 请求 {item['requests']} 次，失败 {item['errors']} 次，"
+                    f"摘除 {item['ejections']} 次，平均延迟 {latency}"
+                )
+
+        token_stats = self.token_pool.stats() if self.token_pool else None
+        if token_stats:
+            print(f"\nToken 用量:")
+            for item in token_stats:
+                state = {"quota": "（配额已用完）", "auth": "（认证失败）"}.get(item["benched"], "")
+                print(f"  {item['token']}: 今日 {item['used']} 次，本进程 {item['requests']} 次{state}")
+
+        concurrency = self.limiter.stats() if adaptive else None
+        if concurrency is not None:
+            print(
+                f"自适应并发: 最终上限 {concurrency['limit']}"
+                f"（最高 {concurrency['peak_limit']}，最低 {concurrency['lowest_limit']}）"
+            )
+
+        stage_totals = batch_timings.to_dict()
+        if stage_totals:
+            print(f"\n各阶段累计耗时:")
+            print(format_stages(stage_totals))
+
+        if failed_files:
+            print(f"\n失败文件列表:")
+            for file_path, error in failed_files:
+                print(f"  - {file_path}: {error}")
+
+        return {
+            "total": total,
+            "success": success_count + resumed_count + skipped_count,
+            "resumed": resumed_count,
+            "skipped": skipped_count,
+            "failed": failed_files,
+            "durations": durations,
+            "stages": file_stages,
+            "stage_totals": stage_totals,
+            "retries": retries,
+            "outages": outages,
+            "hedging": hedging,
+            "endpoints": endpoint_stats,
+            "tokens": token_stats,
+            "concurrency": concurrency,
+            "elapsed": time.perf_counter() - batch_start,
+        }
+
+
+def ocr_file(
+    file_path: str,
+    mode: str = "标准",
+    output_dir: Optional[str] = None,
+    config_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    对单个文件进行 OCR 识别
+    Token 从配置文件中的 .env 自动读取
+    需要反复调用时建议直接使用 PaddleOCRClient，避免每次重新加载配置
+
+    Args:
+        file_path: 文件路径
+        mode: 预设模式（快速/标准/精细）
+        output_dir: 输出目录
+        config_path: 配置文件路径
+
+    Returns:
+        API 响应结果，附加 "timings" 字段（各阶段耗时，见 PaddleOCRClient.ocr）
+    """
+    # 使用共享会话，多次调用之间保持 keep-alive 连接
+    with PaddleOCRClient(
+        mode, config_path,
+        session=get_shared_session("api"),
+        image_session=get_shared_session("image"),
+    ) as client:
+        return client.ocr(file_path, output_dir)
 
 
 def batch_ocr(
@@ -266,37 +1316,29 @@ def batch_ocr(
     mode: str = "标准",
     output_dir: Optional[str] = None,
     config_path: Optional[Path] = None,
-):
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     批量处理多个文件
     Token 从配置文件中的 .env 自动读取
+    所有文件共用一个 PaddleOCRClient（配置只加载一次，连接复用）
 
     Args:
         files: 文件路径列表
         mode: 预设模式
         output_dir: 输出目录
         config_path: 配置文件路径
-    """
-    success_count = 0
-    failed_files = []
+        workers: 并发数，默认读取配置文件中的 batch.workers
 
-    for i, file_path in enumerate(files, 1):
-        print(f"\n[{i}/{len(files)}] 处理文件: {file_path}")
-        try:
-            ocr_file(file_path, mode, output_dir, config_path)
-            success_count += 1
-        except Exception as e:
-            print(f"错误: {e}")
-            failed_files.append((file_path, str(e)))
-
-    # 输出摘要
-    print(f"\n{'='*50}")
-    print(f"处理完成: 成功 {success_count}/{len(files)}")
-
-    if failed_files:
-        print(f"\n失败文件列表:")
-        for file_path, error in failed_files:
-            print(f"  - {file_path}: {error}")
+    Returns:
+        批量处理摘要（见 PaddleOCRClient.batch）
+    """
+    with PaddleOCRClient(
+        mode, config_path,
+        session=get_shared_session("api"),
+        image_session=get_shared_session("image"),
+    ) as client:
+        return client.batch(files, output_dir, workers)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -329,6 +1371,18 @@ def parse_arguments() -> argparse.Namespace:
 
   # 指定输出目录
   python paddleocr_vl.py document.pdf --output ./output
+
+  # 并发批量处理（同时 8 个请求在途）
+  python paddleocr_vl.py *.pdf --workers 8
+
+  # 自适应并发：从 4 开始，按服务端承载能力自动调整
+  python paddleocr_vl.py *.pdf --workers 4 --adaptive
+
+  # 每日增量处理：只识别新增或修改过的文件
+  python paddleocr_vl.py share/*.pdf --incremental
+
+  # 长 PDF 每 20 页一段并发识别
+  python paddleocr_vl.py book.pdf --split-pages 20
         """
     )
 
@@ -355,6 +1409,42 @@ def parse_arguments() -> argparse.Namespace:
         help="配置文件路径（默认: scripts/config.yaml）"
     )
 
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="批量处理并发数（默认: 配置文件中的 batch.workers）"
+    )
+
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        help="PDF 分段页数：长 PDF 按此页数拆分后并发提交（默认: 配置文件中的 pdf_split.pages_per_chunk）"
+    )
+
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="批量处理时不跳过断点日志中已完成的文件（全部重新处理）"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量模式：跳过内容与参数均未变化、且输出文件完整的文件"
+    )
+
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="自适应并发：以 --workers 为初始值，根据延迟与 429/503/超时自动调整在途请求数"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="本次运行不读写结果缓存（即使配置文件中已启用 cache.enabled）"
+    )
+
     return parser.parse_args()
 
 
@@ -388,10 +1478,20 @@ def main():
     # 处理文件
     config_path = Path(args.config) if args.config else None
 
-    if len(files) == 1:
-        ocr_file(files[0], args.mode, args.output, config_path)
-    else:
-        batch_ocr(files, args.mode, args.output, config_path)
+    with PaddleOCRClient(
+        args.mode, config_path,
+        use_cache=not args.no_cache,
+        pages_per_chunk=args.split_pages,
+    ) as client:
+        if len(files) == 1 and not args.incremental and not args.adaptive:
+            client.ocr(files[0], args.output)
+        else:
+            client.batch(
+                files, args.output, args.workers,
+                resume=False if args.no_resume else None,
+                incremental=args.incremental or None,
+                adaptive=args.adaptive or None,
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 异步识别接口
+基于 aiohttp 的协程版本：acall_ocr_api / aocr_file / abatch_ocr
+适合在 asyncio 服务中大量并发处理文档，无需为每个请求占用一个线程
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from config_loader import get_mode_output_format
+from endpoint_pool import EndpointPool
+from rate_limiter import TokenBucket
+from token_pool import TokenPool
+from request_body import StreamingPayload
+from retry_policy import OCRAPIError, RetryPolicy, parse_retry_after
+from paddleocr_vl import (
+    DEFAULT_POOL_SIZE,
+    get_base_url,
+    build_headers,
+    load_ocr_settings,
+    write_markdown_pages,
+    write_image,
+    save_json_result,
+)
+
+
+def _require_aiohttp():
+    """检查 aiohttp 是否已安装"""
+    if aiohttp is None:
+        raise ImportError("异步接口需要安装 aiohttp: pip install aiohttp")
+
+
+async def _astream_body(body: StreamingPayload):
+    """在线程中分块读取并编码请求体，逐块交给 aiohttp 发送，避免阻塞事件循环"""
+    chunks = iter(body)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def _aclassify(policy: RetryPolicy, error: BaseException, file_path: str) -> OCRAPIError:
+    """将 aiohttp 的异常转换为 OCRAPIError，其余异常交给重试策略分类"""
+    if isinstance(error, asyncio.TimeoutError):
+        return OCRAPIError(f"请求超时: {file_path}", retryable=True)
+    if isinstance(error, aiohttp.ClientResponseError):
+        headers = error.headers or {}
+        return OCRAPIError(
+            f"请求失败: {error}",
+            status=error.status,
+            retryable=policy.is_retryable_status(error.status),
+            retry_after=parse_retry_after(headers.get("Retry-After")),
+        )
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return OCRAPIError(f"请求失败: {error}", retryable=True)
+    return policy.classify(error, file_path)
+
+
+async def acall_ocr_api(
+    file_path: str,
+    token: str,
+    api_config: Dict[str, Any],
+    ocr_config: Optional[Dict[str, Any]] = None,
+    session: Optional["aiohttp.ClientSession"] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    endpoints: Optional[EndpointPool] = None,
+    rate_limiter: Optional[TokenBucket] = None,
+    token_pool: Optional[TokenPool] = None,
+) -> Dict[str, Any]:
+    """
+    调用 PaddleOCR-VL API 进行文档识别（协程版本）
+
+    Args:
+        file_path: 文件路径
+        token: API Token
+        api_config: API 配置（base_url, timeout, max_retries）
+        ocr_config: OCR 参数配置
+        session: aiohttp 会话，为空时临时创建
+        retry_policy: 重试策略，为空时按 api_config 创建默认策略
+        endpoints: 部署地址池，每次尝试选择一个地址并使用其 Token 与限速器；
+                   为空时使用 api_config 中的 base_url 与 token
+        rate_limiter: 请求限速器（与同步接口共享同一状态文件），为空时不限速
+        token_pool: Token 池，未使用部署地址池时每次尝试分配剩余额度最多的 Token
+                    及其限速器；为空时使用 token
+
+    Returns:
+        API 响应结果
+
+    Raises:
+        OCRAPIError: 请求失败且不可重试，或重试次数（预算）已用完
+    """
+    _require_aiohttp()
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await acall_ocr_api(
+                file_path, token, api_config, ocr_config, session, retry_policy, endpoints,
+                rate_limiter, token_pool,
+            )
+
+    base_url = get_base_url(api_config) if endpoints is None else None
+    timeout = aiohttp.ClientTimeout(total=api_config.get("timeout", 300))
+    policy = retry_policy if retry_policy is not None else RetryPolicy.from_config(api_config)
+    max_retries = policy.max_attempts
+
+    headers = build_headers(token) if endpoints is None else None
+
+    # 发送请求，可重试的错误按策略退避后重试
+    policy.on_request()
+    delay = None
+    for attempt in range(max_retries):
+        endpoint = None
+        pooled = None
+        try:
+            print(f"正在识别: {file_path} (尝试 {attempt + 1}/{max_retries})")
+            # 请求体流式编码，文件内容不整体读入内存（每次尝试重新创建）
+            body = StreamingPayload.from_path(file_path, ocr_config)
+            url, request_headers, bucket = base_url, headers, rate_limiter
+            if endpoints is not None:
+                # 多地址负载均衡：重试时重新选择，通常会换到其他地址
+                endpoint = endpoints.acquire()
+                url, request_headers, bucket = endpoint.url, build_headers(endpoint.token), endpoint.rate_limiter
+            elif token_pool is not None:
+                # 共享用量文件加锁读写，在线程中执行
+                pooled = await asyncio.to_thread(token_pool.acquire)
+                request_headers, bucket = build_headers(pooled.token), pooled.rate_limiter
+            # 客户端限速：每次发送（含重试）前获取令牌，在事件循环中等待
+            if bucket is not None:
+                waited = await asyncio.to_thread(bucket.reserve)
+                if waited > 0:
+                    await asyncio.sleep(waited)
+            request_headers = dict(request_headers, **{"Content-Length": str(len(body))})
+            start = time.perf_counter()
+            async with session.post(
+                url, data=_astream_body(body), headers=request_headers, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+            latency = time.perf_counter() - start
+
+            if "error_code" in result:
+                error_code = result["error_code"]
+                raise OCRAPIError(
+                    f"API 错误: {result.get('error_msg', '未知错误')}",
+                    error_code=error_code,
+                    retryable=policy.is_retryable_error_code(error_code),
+                )
+
+            if endpoint is not None:
+                endpoints.release(endpoint, latency=latency)
+            if pooled is not None:
+                token_pool.release(pooled)
+            return result
+
+        except Exception as e:
+            error = _aclassify(policy, e, file_path)
+            if endpoint is not None:
+                endpoints.release(endpoint, error=error)
+            if pooled is not None and token_pool.release(pooled, error):
+                # 该 Token 已停用，换用其他 Token 重试
+                error.retryable = True
+            if not policy.should_retry(error, attempt):
+                if error is e:
+                    raise
+                raise error from e
+
+            delay = policy.backoff(delay, error)
+            print(f"{error}，{delay:.1f} 秒后重试...")
+            await asyncio.sleep(delay)
+
+
+async def _adownload_image(
+    session: "aiohttp.ClientSession",
+    output_dir: str,
+    img_rel_path: str,
+    img_url: str,
+    semaphore: asyncio.Semaphore,
+):
+    """下载单张图片并保存，失败时仅打印警告"""
+    try:
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with semaphore:
+            async with session.get(img_url, timeout=timeout) as response:
+                response.raise_for_status()
+                img_bytes = await response.read()
+        await asyncio.to_thread(write_image, output_dir, img_rel_path, img_bytes)
+    except Exception as e:
+        print(f"警告: 图片 {img_rel_path} 保存失败: {e}")
+
+
+async def asave_markdown_result(
+    result: Dict[str, Any],
+    output_dir: str,
+    base_name: str,
+    session: Optional["aiohttp.ClientSession"] = None,
+    image_semaphore: Optional[asyncio.Semaphore] = None,
+):
+    """
+    保存 Markdown 结果（协程版本），文档中的图片并发下载，文件写入在线程中执行
+
+    Args:
+        result: API 响应结果
+        output_dir: 输出目录
+        base_name: 文件基础名
+        session: aiohttp 会话，为空时临时创建
+        image_semaphore: 限制同时下载的图片数（批量处理时在文档间共享），
+                         为空时按 DEFAULT_POOL_SIZE 限制本文档的下载
+    """
+    _require_aiohttp()
+    images = await asyncio.to_thread(write_markdown_pages, result, output_dir, base_name)
+    if not images:
+        return
+
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await _adownload_images(session, output_dir, images, image_semaphore)
+    await _adownload_images(session, output_dir, images, image_semaphore)
+
+
+async def _adownload_images(
+    session: "aiohttp.ClientSession",
+    output_dir: str,
+    images: List[Any],
+    semaphore: Optional[asyncio.Semaphore] = None,
+):
+    """并发下载文档中的图片，同时在途的下载数不超过信号量的上限"""
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DEFAULT_POOL_SIZE)
+    await asyncio.gather(*(
+        _adownload_image(session, output_dir, img_rel_path, img_url, semaphore)
+        for img_rel_path, img_url in images
+    ))
+
+
+def _request_routing(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按配置创建地址池、Token 池与限速器（与同步客户端相同，共享限速状态文件与用量文件）
+
+    Args:
+        settings: load_ocr_settings 的返回值
+
+    Returns:
+        {"endpoints", "rate_limiter", "token_pool"}，可直接作为 acall_ocr_api 的关键字参数
+    """
+    rate_limit_config = settings["rate_limit_config"]
+    return {
+        "endpoints": EndpointPool.from_config(settings["api_config"], settings["token"], rate_limit_config),
+        "rate_limiter": TokenBucket.from_config(rate_limit_config, settings["token"]),
+        "token_pool": TokenPool.from_config(settings["token_pool_config"], rate_limit_config),
+    }
+
+
+def _image_semaphore(settings: Dict[str, Any]) -> asyncio.Semaphore:
+    """按 api.image_pool_size（与同步客户端的图片连接池相同）限制同时下载的图片数"""
+    return asyncio.Semaphore(settings["api_config"].get("image_pool_size") or DEFAULT_POOL_SIZE)
+
+
+async def _aocr_with_settings(
+    file_path: str,
+    settings: Dict[str, Any],
+    output_dir: Optional[str],
+    session: "aiohttp.ClientSession",
+    retry_policy: Optional[RetryPolicy] = None,
+    routing: Optional[Dict[str, Any]] = None,
+    image_semaphore: Optional[asyncio.Semaphore] = None,
+) -> Dict[str, Any]:
+    """使用已加载的配置识别单个文件并保存结果"""
+    ocr_config = settings["ocr_config"]
+    output_format = get_mode_output_format(ocr_config)
+
+    if output_dir is None:
+        output_dir = settings["output_config"].get("markdown_dir", "output")
+
+    if retry_policy is None:
+        retry_policy = RetryPolicy.from_config(settings["api_config"], settings["retry_config"])
+    if routing is None:
+        routing = _request_routing(settings)
+    if image_semaphore is None:
+        image_semaphore = _image_semaphore(settings)
+    result = await acall_ocr_api(
+        file_path, settings["token"], settings["api_config"], ocr_config, session, retry_policy,
+        **routing,
+    )
+
+    base_name = Path(file_path).stem
+
+    if output_format in ["markdown", "both"]:
+        await asave_markdown_result(result, output_dir, base_name, session, image_semaphore)
+
+    if output_format in ["json", "both"]:
+        json_file = os.path.join(output_dir, f"{base_name}.json")
+        await asyncio.to_thread(save_json_result, result, json_file)
+
+    return result
+
+
+async def aocr_file(
+    file_path: str,
+    mode: str = "标准",
+    output_dir: Optional[str] = None,
+    config_path: Optional[Path] = None,
+    session: Optional["aiohttp.ClientSession"] = None,
+) -> Dict[str, Any]:
+    """
+    对单个文件进行 OCR 识别（协程版本）
+
+    Args:
+        file_path: 文件路径
+        mode: 预设模式（快速/标准/精细）
+        output_dir: 输出目录
+        config_path: 配置文件路径
+        session: aiohttp 会话，为空时临时创建
+
+    Returns:
+        API 响应结果
+    """
+    _require_aiohttp()
+    settings = load_ocr_settings(mode, config_path)
+
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await _aocr_with_settings(file_path, settings, output_dir, session)
+    return await _aocr_with_settings(file_path, settings, output_dir, session)
+
+
+async def abatch_ocr(
+    files: List[str],
+    mode: str = "标准",
+    output_dir: Optional[str] = None,
+    config_path: Optional[Path] = None,
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    批量处理多个文件（协程版本）
+    所有文件共用一个会话，通过信号量限制同时在途的文档数
+
+    Args:
+        files: 文件路径列表
+        mode: 预设模式
+        output_dir: 输出目录
+        config_path: 配置文件路径
+        concurrency: 最大并发数，默认读取配置文件中的 batch.workers
+
+    Returns:
+        与 files 顺序一致的结果列表，失败的文件对应位置为异常对象
+    """
+    _require_aiohttp()
+    settings = load_ocr_settings(mode, config_path)
+    if concurrency is None:
+        concurrency = settings["batch_config"].get("workers", 1)
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+    # 所有文件共用一个重试策略与批次重试预算
+    retry_policy = RetryPolicy.from_config(settings["api_config"], settings["retry_config"])
+    retry_budget = retry_policy.new_budget(settings["retry_config"])
+    # 所有文件共用一个地址池、Token 池与限速器，图片下载数在文档间共享上限
+    routing = _request_routing(settings)
+    image_semaphore = _image_semaphore(settings)
+
+    success_count = 0
+    failed_files = []
+
+    async def process(session, file_path):
+        nonlocal success_count
+        async with semaphore:
+            try:
+                result = await _aocr_with_settings(
+                    file_path, settings, output_dir, session, retry_policy, routing,
+                    image_semaphore,
+                )
+                success_count += 1
+                print(f"\n完成: {file_path}")
+                return result
+            except Exception as e:
+                print(f"\n错误: {file_path}: {e}")
+                failed_files.append((file_path, str(e)))
+                return e
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*(process(session, file_path) for file_path in files))
+
+    # 输出摘要
+    print(f"\n{'='*50}")
+    print(f"处理完成: 成功 {success_count}/{len(files)}")
+    retries = retry_budget.stats()
+    if retries["retries"] or retries["denied"]:
+        print(f"重试: {retries['retries']} 次，因预算用完放弃 {retries['denied']} 次")
+
+    if failed_files:
+        print(f"\n失败文件列表:")
+        for file_path, error in failed_files:
+            print(f"  - {file_path}: {error}")
+
+    return results
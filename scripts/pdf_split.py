@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL PDF 分段处理
+将长 PDF 按页拆分为多个分段并发提交，再按页序合并识别结果
+依赖 pypdf（可选）：pip install pypdf
+"""
+import copy
+import io
+from typing import Dict, Any, List, Tuple
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = None
+    PdfWriter = None
+
+
+def _require_pypdf():
+    """检查 pypdf 是否已安装"""
+    if PdfReader is None:
+        raise ImportError("PDF 分段处理需要安装 pypdf: pip install pypdf")
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """
+    获取 PDF 页数
+
+    Args:
+        pdf_path: PDF 文件路径
+
+    Returns:
+        页数
+    """
+    _require_pypdf()
+    return len(PdfReader(pdf_path).pages)
+
+
+def split_pdf(pdf_path: str, pages_per_chunk: int) -> List[Tuple[int, int, bytes]]:
+    """
+    按页拆分 PDF
+
+    Args:
+        pdf_path: PDF 文件路径
+        pages_per_chunk: 每个分段的页数
+
+    Returns:
+        分段列表 [(起始页, 结束页, 分段 PDF 内容)]，页码从 1 开始，按页序排列
+    """
+    _require_pypdf()
+    reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+    chunks = []
+
+    for start in range(0, total_pages, pages_per_chunk):
+        end = min(start + pages_per_chunk, total_pages)
+        writer = PdfWriter()
+        for page_index in range(start, end):
+            writer.add_page(reader.pages[page_index])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        chunks.append((start + 1, end, buffer.getvalue()))
+
+    return chunks
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    按顺序合并多个分段的 API 响应
+    layoutParsingResults 依次拼接，保存时 {base_name}_{i}.md 的编号与原文档页序一致；
+    各页的 prunedResult.page_index 加上分段的起始页偏移（分段内从 0 开始编号），
+    page_count 改为合并后的总页数；其余字段以第一个分段为准
+
+    Args:
+        results: 按页序排列的分段响应
+
+    Returns:
+        合并后的 API 响应
+    """
+    merged = copy.deepcopy(results[0])
+    merged_result = merged.setdefault("result", {})
+    layout_results = []
+    pages = []
+    has_pages = True
+
+    for result in results:
+        chunk_result = result.get("result", {})
+        offset = len(layout_results)
+        for i, page in enumerate(chunk_result.get("layoutParsingResults", [])):
+            page = copy.deepcopy(page)
+            pruned = page.get("prunedResult")
+            if isinstance(pruned, dict) and "page_index" in pruned:
+                # 图片（逐页提交的 TIFF）的 page_index 为空，按其在分段内的位置编号
+                index = pruned["page_index"]
+                pruned["page_index"] = offset + (index if isinstance(index, int) else i)
+            layout_results.append(page)
+        chunk_pages = chunk_result.get("dataInfo", {}).get("pages")
+        if chunk_pages is None:
+            has_pages = False
+        else:
+            pages.extend(chunk_pages)
+
+    for page in layout_results:
+        pruned = page.get("prunedResult")
+        if isinstance(pruned, dict) and "page_count" in pruned:
+            pruned["page_count"] = len(layout_results)
+    merged_result["layoutParsingResults"] = layout_results
+    if has_pages and "dataInfo" in merged_result:
+        merged_result["dataInfo"]["pages"] = pages
+        merged_result["dataInfo"]["numPages"] = len(pages)
+
+    return merged
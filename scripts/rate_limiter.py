@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 请求限速
+令牌桶限制每秒请求数（QPS），可选每日配额；
+共享同一 Token 的多个线程与进程通过状态文件 + 文件锁协调，
+请求在发送前主动等待，避免触发服务端限流后进入指数退避
+"""
+import hashlib
+import json
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, BinaryIO
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+from metrics import RATE_LIMIT_WAIT_SECONDS
+
+# 默认状态目录（同一台机器上的进程共享）
+DEFAULT_STATE_DIR = Path(tempfile.gettempdir()) / "paddleocr_ratelimit"
+
+
+class QuotaExceededError(Exception):
+    """今日请求配额已用完"""
+
+
+@contextmanager
+def locked_file(path: Path) -> Iterator[BinaryIO]:
+    """
+    以独占锁打开状态文件（POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking）
+
+    Args:
+        path: 状态文件路径
+
+    Yields:
+        已加锁的文件对象
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（预约式）
+    每次请求预约一个令牌，令牌不足时计算需要等待的时间并在锁外休眠，
+    并发请求按到达顺序依次排队，不会忙等
+
+    state_path 为空时只在当前进程内生效；
+    指定后桶状态保存在该文件中，所有使用同一文件的进程共同受限
+    """
+
+    def __init__(
+        self,
+        qps: float,
+        burst: int = 1,
+        state_path: Optional[Path] = None,
+        daily_quota: Optional[int] = None,
+    ):
+        """
+        Args:
+            qps: 每秒允许的请求数
+            burst: 桶容量（空闲后允许的突发请求数）
+            state_path: 共享状态文件路径，为空时只在进程内限速
+            daily_quota: 每日请求配额（按本地日期计），为空时不限制
+        """
+        if qps <= 0:
+            raise ValueError(f"qps 必须大于 0: {qps}")
+        self.qps = float(qps)
+        self.burst = max(1, int(burst))
+        self.state_path = Path(state_path) if state_path else None
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+    @classmethod
+    def from_config(cls, rate_limit_config: Dict[str, Any], token: str) -> Optional["TokenBucket"]:
+        """
+        根据配置创建限速器
+
+        Args:
+            rate_limit_config: 限速配置（rate_limit）
+            token: API Token，共享状态文件按 Token 区分（文件名使用其摘要）
+
+        Returns:
+            TokenBucket，未配置 qps 时返回 None
+        """
+        qps = rate_limit_config.get("qps")
+        if not qps:
+            return None
+        state_path = None
+        if rate_limit_config.get("shared", True):
+            state_path = state_file_for(token, rate_limit_config.get("state_dir"))
+        return cls(
+            qps=qps,
+            burst=rate_limit_config.get("burst", 1),
+            state_path=state_path,
+            daily_quota=rate_limit_config.get("daily_quota"),
+        )
+
+    def _initial_state(self) -> Dict[str, Any]:
+        return {"tokens": float(self.burst), "updated": time.time(), "day": "", "count": 0}
+
+    def _reserve(self, state: Dict[str, Any]) -> float:
+        """
+        在桶状态上预约一个令牌
+
+        Args:
+            state: 桶状态（原地修改）
+
+        Returns:
+            需要等待的秒数
+        """
+        now = time.time()
+        today = time.strftime("%Y-%m-%d")
+        if state.get("day") != today:
+            state["day"], state["count"] = today, 0
+        if self.daily_quota is not None and state["count"] >= self.daily_quota:
+            raise QuotaExceededError(f"今日请求配额已用完（{self.daily_quota} 次）")
+
+        # 按经过的时间补充令牌，令牌可以为负，表示已被排队的请求预约
+        elapsed = max(0.0, now - state.get("updated", now))
+        tokens = min(float(self.burst), state.get("tokens", float(self.burst)) + elapsed * self.qps)
+        tokens -= 1
+        state["tokens"] = tokens
+        state["updated"] = now
+        state["count"] += 1
+        return -tokens / self.qps if tokens < 0 else 0.0
+
+    def _reserve_shared(self) -> float:
+        """在共享状态文件上预约令牌"""
+        with locked_file(self.state_path) as f:
+            f.seek(0)
+            try:
+                state = json.loads(f.read().decode("utf-8") or "{}")
+            except ValueError:
+                state = {}
+            if not state:
+                state = self._initial_state()
+            wait = self._reserve(state)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state).encode("utf-8"))
+            f.flush()
+        return wait
+
+    def reserve(self) -> float:
+        """
+        预约发送一次请求的许可（不等待），调用方需等待返回的秒数后再发送
+        异步接口使用：在事件循环中以 asyncio.sleep 等待
+
+        Returns:
+            需要等待的秒数
+
+        Raises:
+            QuotaExceededError: 今日配额已用完
+        """
+        with self._lock:
+            if self.state_path is None:
+                wait = self._reserve(self._state)
+            else:
+                wait = self._reserve_shared()
+        if wait > 0:
+            RATE_LIMIT_WAIT_SECONDS.inc(wait)
+        return wait
+
+    def acquire(self) -> float:
+        """
+        获取发送一次请求的许可，必要时阻塞等待
+
+        Returns:
+            实际等待的秒数
+
+        Raises:
+            QuotaExceededError: 今日配额已用完
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def state_file_for(token: str, state_dir: Optional[str] = None) -> Path:
+    """
+    获取 Token 对应的共享状态文件路径（便于排查与清理）
+
+    Args:
+        token: API Token
+        state_dir: 状态目录，为空时使用默认目录
+
+    Returns:
+        状态文件路径
+    """
+    return Path(state_dir or DEFAULT_STATE_DIR) / f"{token_digest(token)}.json"
+
+
+def token_digest(token: str) -> str:
+    """
+    Token 的摘要（用于状态文件名与统计，避免明文 Token 落盘）
+
+    Args:
+        token: API Token
+
+    Returns:
+        16 位十六进制摘要
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 流式请求体
+请求体按 JSON 前缀、分块 base64 编码的文件内容、参数后缀依次生成，
+文件不再整体读入内存，大 PDF 的峰值内存只与分块大小有关
+"""
+import base64
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, BinaryIO, Iterator
+
+# 文件类型（AI Studio 格式）
+FILE_TYPE_PDF = 0
+FILE_TYPE_IMAGE = 1
+
+# 每次读取的原始字节数，必须是 3 的倍数，保证分块编码结果可以直接拼接
+RAW_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def get_file_type(file_path: str) -> int:
+    """
+    根据扩展名判断文件类型
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        0 表示 PDF，1 表示图片
+    """
+    return FILE_TYPE_PDF if Path(file_path).suffix.lower() == ".pdf" else FILE_TYPE_IMAGE
+
+
+def base64_length(raw_size: int) -> int:
+    """计算 raw_size 字节经 base64 编码后的长度（含填充）"""
+    return (raw_size + 2) // 3 * 4
+
+
+class StreamingPayload:
+    """
+    流式 JSON 请求体：{"file": "<base64>", "fileType": N, ...OCR 参数}
+
+    同时提供 read() 与迭代接口，可直接作为 requests 的 data 参数；
+    长度预先计算，请求仍带 Content-Length 而不是分块传输。
+    请求体只能读取一次，重试时需要重新创建
+    """
+
+    def __init__(
+        self,
+        open_source: Callable[[], BinaryIO],
+        source_size: int,
+        file_type: int,
+        ocr_config: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            open_source: 打开原始文件内容的函数，返回二进制文件对象
+            source_size: 原始内容字节数
+            file_type: 文件类型（0=PDF，1=图片）
+            ocr_config: OCR 参数配置（值为 None 的参数会被过滤）
+        """
+        options = {"fileType": file_type}
+        if ocr_config:
+            for key, value in ocr_config.items():
+                if value is not None:
+                    options[key] = value
+
+        self._prefix = b'{"file": "'
+        # 参数部分序列化为 JSON 对象后去掉开头的 "{"，拼接在文件内容之后
+        self._suffix = b'", ' + json.dumps(options, ensure_ascii=False).encode("utf-8")[1:]
+        self._open_source = open_source
+        self._length = len(self._prefix) + base64_length(source_size) + len(self._suffix)
+        self._chunks = None
+        self._buffer = b""
+        self._pos = 0
+        # 读取与编码文件内容的累计耗时，以及请求体被读取完毕的时刻（用于分阶段计时）
+        self.source_size = source_size
+        self.encode_seconds = 0.0
+        self.finished_at: Optional[float] = None
+
+    @classmethod
+    def from_path(cls, file_path: str, ocr_config: Optional[Dict[str, Any]] = None) -> "StreamingPayload":
+        """
+        基于磁盘文件创建请求体
+
+        Args:
+            file_path: 文件路径
+            ocr_config: OCR 参数配置
+
+        Returns:
+            StreamingPayload
+        """
+        return cls(
+            lambda: open(file_path, "rb"),
+            os.path.getsize(file_path),
+            get_file_type(file_path),
+            ocr_config,
+        )
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes,
+        file_type: int,
+        ocr_config: Optional[Dict[str, Any]] = None,
+    ) -> "StreamingPayload":
+        """
+        基于内存中的文件内容创建请求体（如拆分后的 PDF 分段、预处理后的图片）
+
+        Args:
+            data: 文件内容
+            file_type: 文件类型（0=PDF，1=图片）
+            ocr_config: OCR 参数配置
+
+        Returns:
+            StreamingPayload
+        """
+        return cls(lambda: io.BytesIO(data), len(data), file_type, ocr_config)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _generate(self) -> Iterator[bytes]:
+        """依次生成 JSON 前缀、base64 编码的文件分块与参数后缀"""
+        yield self._prefix
+        with self._open_source() as source:
+            while True:
+                start = time.perf_counter()
+                raw = source.read(RAW_CHUNK_SIZE)
+                encoded = base64.b64encode(raw) if raw else None
+                self.encode_seconds += time.perf_counter() - start
+                if encoded is None:
+                    break
+                yield encoded
+        yield self._suffix
+        self.finished_at = time.perf_counter()
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._chunks is None:
+            self._chunks = self._generate()
+        remaining = self._buffer[self._pos:]
+        self._buffer, self._pos = b"", 0
+        if remaining:
+            yield remaining
+        yield from self._chunks
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        读取请求体（文件对象接口，供 HTTP 库分块发送）
+        与普通文件一样可能返回少于 size 的数据，返回 b"" 表示读取完毕
+
+        Args:
+            size: 最多读取的字节数，-1 表示读取剩余全部内容
+
+        Returns:
+            请求体数据
+        """
+        if self._chunks is None:
+            self._chunks = self._generate()
+
+        if size < 0:
+            data = self._buffer[self._pos:] + b"".join(self._chunks)
+            self._buffer, self._pos = b"", 0
+            return data
+
+        # 当前分块用完后再取下一块，避免反复拼接大缓冲区
+        while size and self._pos >= len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._buffer, self._pos = chunk, 0
+
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 结果缓存
+以“文件内容 SHA-256 + OCR 参数摘要”为键，将 API 响应持久化到磁盘，
+重复处理同一文件时跳过远程推理；超出容量上限时按最近最少使用（LRU）淘汰
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache"
+DEFAULT_MAX_SIZE_MB = 1024
+
+
+class ResultCache:
+    """
+    基于内容寻址的 API 响应缓存
+    每条记录为一个 JSON 文件，文件修改时间即最近访问时间（命中时刷新）
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """
+        Args:
+            cache_dir: 缓存目录，默认 scripts/.cache
+            max_size_mb: 容量上限（MB）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # 总大小在首次写入时才扫描目录统计，只读命中的客户端无需遍历缓存
+        self._total_size: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> Optional["ResultCache"]:
+        """
+        根据配置创建缓存，未启用时返回 None
+
+        Args:
+            cache_config: 配置文件中的 cache 部分
+
+        Returns:
+            ResultCache 或 None
+        """
+        if not cache_config.get("enabled"):
+            return None
+        return cls(
+            cache_config.get("dir"),
+            cache_config.get("max_size_mb") or DEFAULT_MAX_SIZE_MB,
+        )
+
+    def _path(self, key: str) -> Path:
+        """缓存记录路径（按键前两位分目录，避免单目录文件过多）"""
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _scan(self):
+        """遍历所有缓存记录，返回 (路径, 大小, 访问时间)"""
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存，命中时刷新访问时间
+
+        Args:
+            key: 缓存键（fingerprint.document_key）
+
+        Returns:
+            API 响应结果，未命中返回 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # 记录损坏时视为未命中并删除
+            with self._lock:
+                freed = self._remove(path)
+                if self._total_size is not None:
+                    self._total_size -= freed
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """
+        写入缓存（先写临时文件再原子替换），超出容量时淘汰最久未使用的记录
+
+        Args:
+            key: 缓存键
+            result: API 响应结果
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._total_size is None:
+                # 扫描结果已包含刚写入的记录
+                self._total_size = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_size += len(data) - old_size
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _remove(self, path: Path) -> int:
+        """删除单条记录，返回释放的字节数"""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """按访问时间从旧到新淘汰，直到总大小回落到上限以内（调用方持有锁）"""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        # 以磁盘实际大小为准，兼容其他进程共享同一缓存目录
+        self._total_size = sum(size for _, size, _ in entries)
+        for path, _, _ in entries:
+            if self._total_size <= self.max_size_bytes:
+                break
+            self._total_size -= self._remove(path)
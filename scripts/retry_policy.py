@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 重试策略
+区分可重试与不可重试的错误，遵循 Retry-After，使用去相关抖动（decorrelated jitter）
+计算等待时间，并按批次限制重试总量，避免重试放大服务端过载
+"""
+import copy
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, Iterable
+
+import requests
+
+from metrics import RETRIES_DENIED
+
+# 默认可重试的 HTTP 状态码
+DEFAULT_RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+# 默认可重试的 API error_code（4: 请求频率超限，18: QPS 超限）
+DEFAULT_RETRYABLE_ERROR_CODES = (4, 18)
+
+
+class OCRAPIError(Exception):
+    """
+    API 调用失败
+
+    Attributes:
+        status: HTTP 状态码（非 HTTP 错误时为 None）
+        error_code: 响应中的 error_code（没有时为 None）
+        retryable: 是否值得重试
+        retry_after: 服务端要求的重试等待秒数（Retry-After），没有时为 None
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        error_code: Optional[Any] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（秒数或 HTTP 日期）
+
+    Args:
+        value: 响应头的值
+
+    Returns:
+        等待秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryBudget:
+    """
+    批次级重试预算（线程安全）
+    重试次数不超过 min_retries + ratio × 请求数；服务端整体故障时，
+    每个文件各自重试会成倍放大请求量，预算用完后失败的请求不再重试
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        """
+        Args:
+            ratio: 允许的重试数与请求数之比
+            min_retries: 不受比例限制的最少重试次数（批次开始阶段请求数较少）
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self):
+        """记录一次新请求（不含重试）"""
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """
+        尝试消耗一次重试额度
+
+        Returns:
+            是否允许重试
+        """
+        with self._lock:
+            if self.retries < self.min_retries + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """导出统计 {"requests", "retries", "denied"}"""
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "denied": self.denied}
+
+
+class RetryPolicy:
+    """
+    重试策略
+    classify() 把请求过程中的异常统一转换为 OCRAPIError 并判定是否可重试；
+    如需自定义分类规则，可继承本类并覆盖 classify() 或 is_retryable_error_code()
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        retryable_status: Iterable[int] = DEFAULT_RETRYABLE_STATUS,
+        retryable_error_codes: Iterable[Any] = DEFAULT_RETRYABLE_ERROR_CODES,
+        honor_retry_after: bool = True,
+        max_retry_after: float = 300.0,
+        budget: Optional[RetryBudget] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            max_attempts: 最大尝试次数（含首次请求）
+            base_delay: 最短等待时间（秒）
+            max_delay: 抖动计算的等待时间上限（秒）
+            retryable_status: 可重试的 HTTP 状态码
+            retryable_error_codes: 可重试的 API error_code
+            honor_retry_after: 是否遵循服务端返回的 Retry-After
+            max_retry_after: Retry-After 的上限（秒），防止异常值导致长时间挂起
+            budget: 重试预算，为空时不限制重试总量
+            rng: 随机数生成器（便于复现）
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max(max_delay, base_delay)
+        self.retryable_status = set(retryable_status)
+        self.retryable_error_codes = {str(code) for code in retryable_error_codes}
+        self.honor_retry_after = honor_retry_after
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self._rng = rng or random.Random()
+
+    @classmethod
+    def from_config(cls, api_config: Dict[str, Any], retry_config: Optional[Dict[str, Any]] = None) -> "RetryPolicy":
+        """
+        根据配置创建重试策略
+
+        Args:
+            api_config: API 配置（max_retries 为最大尝试次数）
+            retry_config: 重试配置（retry）
+
+        Returns:
+            RetryPolicy
+        """
+        retry_config = retry_config or {}
+        return cls(
+            max_attempts=api_config.get("max_retries", 3),
+            base_delay=retry_config.get("base_delay", 1.0),
+            max_delay=retry_config.get("max_delay", 60.0),
+            retryable_status=retry_config.get("retryable_status") or DEFAULT_RETRYABLE_STATUS,
+            retryable_error_codes=retry_config.get("retryable_error_codes") or DEFAULT_RETRYABLE_ERROR_CODES,
+            honor_retry_after=retry_config.get("honor_retry_after", True),
+            max_retry_after=retry_config.get("max_retry_after", 300.0),
+        )
+
+    def new_budget(self, retry_config: Optional[Dict[str, Any]] = None) -> RetryBudget:
+        """
+        为一个批次创建新的重试预算并启用
+
+        Args:
+            retry_config: 重试配置（budget_ratio, budget_min_retries）
+
+        Returns:
+            RetryBudget
+        """
+        retry_config = retry_config or {}
+        self.budget = RetryBudget(
+            ratio=retry_config.get("budget_ratio", 0.2),
+            min_retries=retry_config.get("budget_min_retries", 10),
+        )
+        return self.budget
+
+    def with_new_budget(self, retry_config: Optional[Dict[str, Any]] = None) -> "RetryPolicy":
+        """
+        复制策略并附加新的重试预算，原策略不受影响
+        同一客户端上的多个批次（包括并发的批次）各自使用自己的预算
+
+        Args:
+            retry_config: 重试配置（budget_ratio, budget_min_retries）
+
+        Returns:
+            带预算的 RetryPolicy 副本
+        """
+        policy = copy.copy(self)
+        policy.new_budget(retry_config)
+        return policy
+
+    def is_retryable_status(self, status: int) -> bool:
+        """HTTP 状态码是否可重试"""
+        return status in self.retryable_status
+
+    def is_retryable_error_code(self, error_code: Any) -> bool:
+        """API error_code 是否可重试"""
+        return str(error_code) in self.retryable_error_codes
+
+    def classify(self, error: BaseException, file_path: str) -> OCRAPIError:
+        """
+        将请求过程中的异常转换为 OCRAPIError
+
+        Args:
+            error: 原始异常
+            file_path: 文件路径（用于错误信息）
+
+        Returns:
+            OCRAPIError
+        """
+        if isinstance(error, OCRAPIError):
+            return error
+        if isinstance(error, requests.exceptions.Timeout):
+            return OCRAPIError(f"请求超时: {file_path}", retryable=True)
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return OCRAPIError(
+                f"请求失败: {error}",
+                status=status,
+                retryable=self.is_retryable_status(status),
+                retry_after=parse_retry_after(error.response.headers.get("Retry-After")),
+            )
+        if isinstance(error, (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.ContentDecodingError,
+        )):
+            return OCRAPIError(f"请求失败: {error}", retryable=True)
+        if isinstance(error, ValueError) and isinstance(error, requests.exceptions.RequestException):
+            # 响应不是合法 JSON（通常是网关返回的错误页或连接中断导致的截断）
+            return OCRAPIError(f"请求失败: 响应解析失败: {error}", retryable=True)
+        if isinstance(error, requests.exceptions.RequestException):
+            # URL 无效等配置错误，重试不会成功
+            return OCRAPIError(f"请求失败: {error}")
+        return OCRAPIError(f"识别失败: {error}")
+
+    def on_request(self):
+        """一次新的 API 调用开始（计入重试预算的分母）"""
+        if self.budget is not None:
+            self.budget.record_request()
+
+    def should_retry(self, error: OCRAPIError, attempt: int) -> bool:
+        """
+        是否对失败的请求进行重试
+
+        Args:
+            error: 分类后的错误
+            attempt: 本次尝试序号（从 0 开始）
+
+        Returns:
+            是否重试
+        """
+        if not error.retryable or attempt >= self.max_attempts - 1:
+            return False
+        if self.budget is not None and not self.budget.try_spend():
+            RETRIES_DENIED.inc()
+            print(f"重试预算已用完，不再重试: {error}")
+            return False
+        return True
+
+    def backoff(self, previous_delay: Optional[float], error: OCRAPIError) -> float:
+        """
+        计算下一次重试前的等待时间
+        去相关抖动：在 [base_delay, 上次等待 × 3] 中随机取值，并发的请求不会同时重试；
+        服务端返回 Retry-After 时至少等待该时间
+
+        Args:
+            previous_delay: 上次等待时间，首次重试为 None
+            error: 分类后的错误
+
+        Returns:
+            等待秒数
+        """
+        previous = previous_delay or self.base_delay
+        delay = min(self.max_delay, self._rng.uniform(self.base_delay, previous * 3))
+        if self.honor_retry_after and error.retry_after is not None:
+            delay = max(delay, min(error.retry_after, self.max_retry_after))
+        return delay
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 进行中请求合并（singleflight）
+同一进程内并发识别相同的文件（内容 + 参数相同）时，只发送一次请求，
+其余调用等待并共用其结果；不依赖持久化缓存
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import COALESCED_REQUESTS
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    按键合并并发调用（线程安全）
+    第一个调用者执行函数，同一键上后到的调用者等待其完成并获得相同的结果或异常；
+    调用结束后立即移除，之后的调用重新执行
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行函数，同一键上已有进行中的调用时等待其结果
+
+        Args:
+            key: 合并键
+            fn: 无参函数
+
+        Returns:
+            (结果, 是否为共用的结果)
+
+        Raises:
+            fn 抛出的异常（共用调用者收到同一个异常）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            COALESCED_REQUESTS.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+# 进程内共享：ocr_file 等每次创建新客户端的调用之间也能合并
+INFLIGHT = SingleFlight()
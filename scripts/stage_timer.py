@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 分阶段计时
+记录每个文档在各处理阶段的耗时、字节数与次数，用于定位批量处理的瓶颈
+"""
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Iterator, Optional
+
+from metrics import STAGE_SECONDS
+
+# 阶段名称（按处理顺序，用于输出排序）
+STAGE_SPLIT = "split"                    # PDF 分段 / 多页 TIFF 拆分
+STAGE_PREPROCESS = "preprocess"          # 图片本地预处理（缩小等）
+STAGE_RATE_LIMIT = "rate_limit"          # 发送前等待限速令牌
+STAGE_READ_ENCODE = "read_encode"        # 读取文件并 base64 编码
+STAGE_UPLOAD = "upload"                  # 发送请求体（不含编码时间）
+STAGE_INFERENCE = "inference"            # 请求发送完毕到收到响应头（服务端处理）
+STAGE_DOWNLOAD = "download"              # 接收 API 响应体
+STAGE_PARSE = "parse"                    # 解析 JSON 响应
+STAGE_CACHE = "cache"                    # 读取结果缓存
+STAGE_MARKDOWN_WRITE = "markdown_write"  # 写出 Markdown 文件
+STAGE_IMAGE_DOWNLOAD = "image_download"  # 下载并保存图片
+STAGE_JSON_WRITE = "json_write"          # 写出 JSON 文件
+
+STAGE_ORDER = (
+    STAGE_SPLIT,
+    STAGE_PREPROCESS,
+    STAGE_RATE_LIMIT,
+    STAGE_READ_ENCODE,
+    STAGE_UPLOAD,
+    STAGE_INFERENCE,
+    STAGE_DOWNLOAD,
+    STAGE_PARSE,
+    STAGE_CACHE,
+    STAGE_MARKDOWN_WRITE,
+    STAGE_IMAGE_DOWNLOAD,
+    STAGE_JSON_WRITE,
+)
+
+
+class StageTimings:
+    """
+    单个文档（或整个批次）的分阶段统计，线程安全
+    并发执行的阶段（PDF 分段、图片下载）耗时按累计值记录，可能大于墙钟时间
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, seconds: float = 0.0, nbytes: int = 0, count: int = 1):
+        """
+        累加一次阶段记录，并计入阶段耗时指标
+
+        Args:
+            stage: 阶段名称
+            seconds: 耗时（秒）
+            nbytes: 处理的字节数
+            count: 次数
+        """
+        STAGE_SECONDS.observe(max(seconds, 0.0), stage=stage)
+        self._accumulate(stage, seconds, nbytes, count)
+
+    def _accumulate(self, stage: str, seconds: float, nbytes: int, count: int):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"seconds": 0.0, "bytes": 0, "count": 0})
+            entry["seconds"] += max(seconds, 0.0)
+            entry["bytes"] += nbytes
+            entry["count"] += count
+
+    @contextmanager
+    def measure(self, stage: str, nbytes: int = 0) -> Iterator[None]:
+        """
+        计时上下文，退出时记录耗时（出现异常也会记录）
+
+        Args:
+            stage: 阶段名称
+            nbytes: 处理的字节数
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, nbytes)
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]):
+        """
+        将另一份统计累加到当前统计（用于汇总批次）
+
+        Args:
+            stages: StageTimings.to_dict() 的结果
+        """
+        # 汇总的是已经计入指标的记录，不再重复观测
+        for stage, entry in stages.items():
+            self._accumulate(stage, entry["seconds"], entry["bytes"], entry["count"])
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        导出统计
+
+        Returns:
+            {阶段: {"seconds": 耗时, "bytes": 字节数, "count": 次数}}，按处理顺序排列
+        """
+        with self._lock:
+            stages = {stage: dict(entry) for stage, entry in self._stages.items()}
+        ordered = {stage: stages.pop(stage) for stage in STAGE_ORDER if stage in stages}
+        ordered.update(stages)
+        for entry in ordered.values():
+            entry["seconds"] = round(entry["seconds"], 6)
+        return ordered
+
+
+def format_stages(stages: Dict[str, Dict[str, Any]], indent: str = "  ") -> str:
+    """
+    将分阶段统计格式化为文本表格
+
+    Args:
+        stages: StageTimings.to_dict() 的结果
+        indent: 每行缩进
+
+    Returns:
+        多行文本
+    """
+    total = sum(entry["seconds"] for entry in stages.values()) or 1.0
+    lines = []
+    for stage, entry in stages.items():
+        share = entry["seconds"] / total
+        line = f"{indent}{stage:<15} {entry['seconds']:>10.3f}s {share:>6.1%}  x{entry['count']}"
+        if entry["bytes"]:
+            line += f"  {entry['bytes'] / 1024 / 1024:.2f} MB"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def timed(timings: Optional[StageTimings], stage: str, nbytes: int = 0):
+    """timings 为空时不计时，便于在可选参数上直接使用 with 语句"""
+    if timings is None:
+        return nullcontext()
+    return timings.measure(stage, nbytes)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL 多页 TIFF 拆分
+将多页 TIFF（传真、档案扫描件）按页拆分：合成的 PDF 不超过阈值时一次提交，
+否则逐页作为图片并发提交，再按页序合并识别结果（与 PDF 分段相同）
+依赖 Pillow（可选）：pip install Pillow
+"""
+import io
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps, ImageSequence
+except ImportError:
+    Image = None
+    ImageOps = None
+    ImageSequence = None
+
+from image_preprocess import encode_page, resize_page
+from request_body import FILE_TYPE_IMAGE, FILE_TYPE_PDF
+
+# 多页 TIFF 的扩展名
+TIFF_FORMATS = {".tif", ".tiff"}
+# PDF 中的页面分辨率缺省值（TIFF 未记录 DPI 时）
+DEFAULT_DPI = 200
+
+
+def _require_pillow():
+    """检查 Pillow 是否已安装"""
+    if Image is None:
+        raise ImportError("多页 TIFF 拆分需要安装 Pillow: pip install Pillow")
+
+
+def count_tiff_pages(file_path: str) -> int:
+    """
+    获取 TIFF 页数
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        页数，不是 TIFF 文件时返回 1
+    """
+    if Path(file_path).suffix.lower() not in TIFF_FORMATS:
+        return 1
+    _require_pillow()
+    with Image.open(file_path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def load_tiff_pages(
+    file_path: str,
+    preprocess_config: Dict[str, Any],
+    ocr_config: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Any], float]:
+    """
+    逐页读取 TIFF，并按预处理配置缩小
+
+    Args:
+        file_path: 文件路径
+        preprocess_config: 预处理配置（preprocess）
+        ocr_config: OCR 参数配置（maxPixels, minPixels）
+
+    Returns:
+        (按页序排列的 PIL 图片, 缩小后第一页的 DPI)
+    """
+    _require_pillow()
+    pages = []
+    dpi = None
+    with Image.open(file_path) as image:
+        for frame in ImageSequence.Iterator(image):
+            page = ImageOps.exif_transpose(frame)
+            resized = resize_page(page, preprocess_config, ocr_config)
+            if dpi is None:
+                source_dpi = float((frame.info.get("dpi") or (DEFAULT_DPI,))[0]) or DEFAULT_DPI
+                # 缩小后保持页面的物理尺寸不变
+                dpi = source_dpi * resized.width / page.width
+            pages.append(resized)
+    return pages, dpi or DEFAULT_DPI
+
+
+def pages_to_pdf(pages: List[Any], dpi: float = DEFAULT_DPI) -> bytes:
+    """
+    将多页图片合成为 PDF（黑白页保持 1 位，彩色与灰度页以 JPEG 嵌入）
+
+    Args:
+        pages: PIL 图片列表
+        dpi: 页面分辨率
+
+    Returns:
+        PDF 内容
+    """
+    converted = [page if page.mode in ("1", "L", "RGB") else page.convert("RGB") for page in pages]
+    options = {"resolution": dpi}
+    # 黑白页以 CCITT G4 嵌入，Pillow 会把 quality 一并传给该编码器（不支持），只在没有黑白页时设置
+    if all(page.mode != "1" for page in converted):
+        options["quality"] = 95
+    buffer = io.BytesIO()
+    converted[0].save(buffer, format="PDF", save_all=True, append_images=converted[1:], **options)
+    return buffer.getvalue()
+
+
+def split_tiff(
+    file_path: str,
+    preprocess_config: Dict[str, Any],
+    ocr_config: Optional[Dict[str, Any]] = None,
+    bundle_max_bytes: Optional[int] = None,
+) -> Tuple[int, List[bytes], int]:
+    """
+    拆分多页 TIFF，并选择提交方式
+
+    Args:
+        file_path: 文件路径
+        preprocess_config: 预处理配置（逐页缩小与编码方式）
+        ocr_config: OCR 参数配置
+        bundle_max_bytes: 合成的 PDF 不超过该值时一次提交，为空时总是逐页提交
+
+    Returns:
+        (文件类型, 请求内容列表, 页数)：
+        合成 PDF 时为 (FILE_TYPE_PDF, [PDF 内容], 页数)，
+        逐页提交时为 (FILE_TYPE_IMAGE, [各页图片内容], 页数)
+    """
+    pages, dpi = load_tiff_pages(file_path, preprocess_config, ocr_config)
+    if bundle_max_bytes:
+        # 以实际上传的 PDF 大小判断，合成 PDF 时各页无需再单独编码
+        pdf = pages_to_pdf(pages, dpi)
+        if len(pdf) <= bundle_max_bytes:
+            return FILE_TYPE_PDF, [pdf], len(pages)
+    return FILE_TYPE_IMAGE, [encode_page(page, preprocess_config) for page in pages], len(pages)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR-VL Token 池
+多个 AI Studio 账号的 Token 轮换使用：按当日用量记账，每次请求分配给剩余额度最多的 Token，
+返回配额或认证错误的 Token 自动停用，持续吞吐量为各账号限额之和
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from metrics import TOKEN_BENCHED, TOKEN_REQUESTS
+from rate_limiter import DEFAULT_STATE_DIR, TokenBucket, locked_file, token_digest
+from retry_policy import OCRAPIError
+
+# 默认视为配额用完的 API error_code（17: 每日配额用完，19: 总配额用完）
+DEFAULT_QUOTA_ERROR_CODES = (17, 19)
+# 默认视为认证失败的 HTTP 状态码
+DEFAULT_AUTH_STATUS = (401, 403)
+
+# 停用原因
+BENCH_QUOTA = "quota"
+BENCH_AUTH = "auth"
+
+# 用量文件名（同一状态目录下的进程共享）
+USAGE_FILE = "token_usage.json"
+
+
+def mask_token(token: str) -> str:
+    """日志中显示的 Token（只保留首尾各 4 位）"""
+    if len(token) <= 8:
+        return "****"
+    return f"{token[:4]}****{token[-4:]}"
+
+
+class PooledToken:
+    """Token 池中的单个 Token 及其状态"""
+
+    def __init__(self, token: str, rate_limiter: Optional[TokenBucket] = None):
+        """
+        Args:
+            token: API Token
+            rate_limiter: 该 Token 的请求限速器，为空时不限速
+        """
+        self.token = token
+        self.digest = token_digest(token)
+        self.label = mask_token(token)
+        self.rate_limiter = rate_limiter
+        self.used = 0
+        self.requests = 0
+        self.outstanding = 0
+        self.benched: Optional[str] = None
+        self.benched_day: Optional[str] = None
+
+
+class TokenPool:
+    """
+    Token 池（线程安全）
+
+    - 剩余额度 = daily_quota - 当日用量；未设置配额时选择用量最少的 Token
+    - 当日用量在分配时计入；shared 为 True 时保存在状态文件中，多个进程共同记账
+    - 配额错误：停用到次日（本地日期）；认证错误：本次运行内停用
+    - 全部 Token 都不可用时抛出不可重试的 OCRAPIError
+    """
+
+    def __init__(
+        self,
+        tokens: List[PooledToken],
+        daily_quota: Optional[int] = None,
+        quota_error_codes=DEFAULT_QUOTA_ERROR_CODES,
+        auth_status=DEFAULT_AUTH_STATUS,
+        usage_path: Optional[Path] = None,
+    ):
+        """
+        Args:
+            tokens: Token 列表
+            daily_quota: 每个 Token 的每日请求配额，为空时不限制
+            quota_error_codes: 视为配额用完的 API error_code
+            auth_status: 视为认证失败的 HTTP 状态码
+            usage_path: 共享用量文件路径，为空时只在进程内记账
+        """
+        if not tokens:
+            raise ValueError("Token 池为空")
+        self.tokens = tokens
+        self.daily_quota = daily_quota
+        self.quota_error_codes = {str(code) for code in quota_error_codes}
+        self.auth_status = set(auth_status)
+        self.usage_path = Path(usage_path) if usage_path else None
+        self._lock = threading.Lock()
+        self._day = time.strftime("%Y-%m-%d")
+
+    @classmethod
+    def from_config(
+        cls,
+        token_pool_config: Dict[str, Any],
+        rate_limit_config: Optional[Dict[str, Any]] = None,
+    ) -> Optional["TokenPool"]:
+        """
+        根据配置创建 Token 池
+
+        Args:
+            token_pool_config: Token 池配置（token_pool）
+            rate_limit_config: 限速配置；按各 Token 分别限速，daily_quota 作为每个 Token 的配额
+
+        Returns:
+            TokenPool，配置的 Token 少于 2 个时返回 None（使用单一 Token）
+        """
+        values = list(dict.fromkeys(t for t in token_pool_config.get("tokens") or [] if t))
+        if len(values) < 2:
+            return None
+        rate_limit_config = rate_limit_config or {}
+        usage_path = None
+        if token_pool_config.get("shared", True):
+            state_dir = token_pool_config.get("state_dir") or rate_limit_config.get("state_dir")
+            usage_path = Path(state_dir or DEFAULT_STATE_DIR) / USAGE_FILE
+        return cls(
+            [PooledToken(token, TokenBucket.from_config(rate_limit_config, token)) for token in values],
+            daily_quota=rate_limit_config.get("daily_quota"),
+            quota_error_codes=token_pool_config.get("quota_error_codes") or DEFAULT_QUOTA_ERROR_CODES,
+            auth_status=token_pool_config.get("auth_status") or DEFAULT_AUTH_STATUS,
+            usage_path=usage_path,
+        )
+
+    def _refresh_day(self, today: str):
+        if today == self._day:
+            return
+        self._day = today
+        for item in self.tokens:
+            item.used = 0
+            if item.benched == BENCH_QUOTA and item.benched_day != today:
+                item.benched = None
+
+    def _remaining(self, item: PooledToken) -> float:
+        if self.daily_quota is None:
+            return -item.used
+        return self.daily_quota - item.used
+
+    def _available(self) -> List[PooledToken]:
+        return [
+            item for item in self.tokens
+            if item.benched is None and (self.daily_quota is None or item.used < self.daily_quota)
+        ]
+
+    def _pick(self) -> PooledToken:
+        candidates = self._available()
+        if not candidates:
+            raise OCRAPIError("Token 池中没有可用的 Token（配额已用完或认证失败）")
+        item = max(candidates, key=lambda t: (self._remaining(t), -t.outstanding))
+        item.used += 1
+        return item
+
+    def _pick_shared(self) -> PooledToken:
+        """在共享用量文件上选择 Token 并计入用量"""
+        with locked_file(self.usage_path) as f:
+            f.seek(0)
+            try:
+                usage = json.loads(f.read().decode("utf-8") or "{}")
+            except ValueError:
+                usage = {}
+            if usage.get("day") != self._day:
+                usage = {"day": self._day, "counts": {}}
+            counts = usage.setdefault("counts", {})
+            for item in self.tokens:
+                item.used = counts.get(item.digest, 0)
+            item = self._pick()
+            counts[item.digest] = item.used
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(usage).encode("utf-8"))
+            f.flush()
+        return item
+
+    def acquire(self) -> PooledToken:
+        """
+        为一次请求分配 Token，请求结束后必须调用 release()
+
+        Returns:
+            PooledToken
+
+        Raises:
+            OCRAPIError: 没有可用的 Token
+        """
+        with self._lock:
+            self._refresh_day(time.strftime("%Y-%m-%d"))
+            item = self._pick_shared() if self.usage_path is not None else self._pick()
+            item.requests += 1
+            item.outstanding += 1
+        TOKEN_REQUESTS.inc(token=item.label)
+        return item
+
+    def release(self, item: PooledToken, error: Optional[OCRAPIError] = None) -> bool:
+        """
+        请求结束，按错误类型停用 Token
+
+        Args:
+            item: acquire() 返回的 Token
+            error: 分类后的错误，成功时为 None
+
+        Returns:
+            是否因该错误停用了 Token（换用其他 Token 重试可能成功）
+        """
+        if error is None:
+            reason = None
+        elif error.status in self.auth_status:
+            reason = BENCH_AUTH
+        elif error.error_code is not None and str(error.error_code) in self.quota_error_codes:
+            reason = BENCH_QUOTA
+        else:
+            reason = None
+
+        with self._lock:
+            item.outstanding -= 1
+            if reason is None:
+                return False
+            if item.benched is not None:
+                # 并发的其他请求已停用该 Token
+                return True
+            item.benched = reason
+            item.benched_day = self._day
+        if reason == BENCH_AUTH:
+            print(f"Token 认证失败（HTTP {error.status}），本次运行不再使用: {item.label}")
+        else:
+            print(f"Token 配额已用完（error_code {error.error_code}），今日不再使用: {item.label}")
+        TOKEN_BENCHED.inc(reason=reason)
+        return True
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        导出各 Token 的用量统计
+
+        Returns:
+            [{"token", "used", "requests", "benched"}]，token 为脱敏后的值
+        """
+        with self._lock:
+            return [
+                {
+                    "token": item.label,
+                    "used": item.used,
+                    "requests": item.requests,
+                    "benched": item.benched,
+                }
+                for item in self.tokens
+            ]